@@ -1,6 +1,8 @@
 # Predefined lists of cities for broad geographic searches
 
-MAJOR_US_METROS = [
+from types import MappingProxyType
+
+MAJOR_US_METROS = (
     "New York City",
     "Los Angeles",
     "Chicago",
@@ -28,17 +30,20 @@ MAJOR_US_METROS = [
     "Atlanta",
     "Miami",
     # Add more or refine as needed
-]
+)
 
 # In the future, other lists can be added here:
-# EUROPEAN_CAPITALS = ["London", "Paris", "Berlin", "Madrid", "Rome"]
-# ASIAN_HUBS = ["Tokyo", "Singapore", "Hong Kong", "Seoul", "Bangkok"]
+# EUROPEAN_CAPITALS = ("London", "Paris", "Berlin", "Madrid", "Rome")
+# ASIAN_HUBS = ("Tokyo", "Singapore", "Hong Kong", "Seoul", "Bangkok")
 
-PREDEFINED_CITY_LISTS = {
-    "Major US Metros": MAJOR_US_METROS,
-    # "European Capitals": EUROPEAN_CAPITALS,
-    # "Asian Hubs": ASIAN_HUBS,
-}
+# Read-only: the lists are shared by every app session
+PREDEFINED_CITY_LISTS = MappingProxyType(
+    {
+        "Major US Metros": MAJOR_US_METROS,
+        # "European Capitals": EUROPEAN_CAPITALS,
+        # "Asian Hubs": ASIAN_HUBS,
+    }
+)
 
 if __name__ == '__main__':
     # For basic testing or inspection of the lists
@@ -1,11 +1,17 @@
 import argparse
 import concurrent.futures  # Added import
+import functools
+import heapq
+import http.cookiejar
 import json
 import logging
+import os
 import re  # Added for cURL parsing
 import sys
-import urllib.parse
+import threading
+import time
 from datetime import date, datetime, timedelta
+from operator import itemgetter
 from typing import (  # Changed callable to Callable
     Any,
     Callable,
@@ -15,9 +21,18 @@ from typing import (  # Changed callable to Callable
     Tuple,
 )
 
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter, Retry
 from tqdm import tqdm
 
+try:
+    import orjson
+
+    _loads_json = orjson.loads
+except ImportError:
+    _loads_json = json.loads
+
 # Configure root logger for general logs (stderr)
 logging.basicConfig(
     level=logging.INFO,
@@ -36,12 +51,74 @@ results_logger.propagate = (
 )
 
 # Constants for API interaction
+AADVANTAGE_HOTELS_SITE_URL = "https://www.aadvantagehotels.com/"
 PLACES_API_URL = "https://www.aadvantagehotels.com/rest/aadvantage-hotels/places"
 SEARCH_API_BASE_URL = (
     "https://www.aadvantagehotels.com/rest/aadvantage-hotels/searchRequest"
 )
 RESULTS_API_BASE_URL = "https://www.aadvantagehotels.com/rest/aadvantage-hotels/search"
 
+# Sent with every request; session headers (cookies, XSRF token) are layered on top
+DEFAULT_REQUEST_HEADERS = {
+    "accept": "application/json, text/plain, */*",
+    "accept-language": "en-US,en;q=0.9",
+    "user-agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    # Only the compressions this requests/urllib3 install can decode (gzip and
+    # deflate, plus br/zstd when their decoders are installed).
+    "accept-encoding": requests.utils.DEFAULT_ACCEPT_ENCODING,
+}
+
+
+def _concurrency_from_env(default: int) -> int:
+    raw_value = os.environ.get("AA_HOTEL_CONCURRENCY")
+    if raw_value is None:
+        return default
+    try:
+        value = int(raw_value)
+    except ValueError:
+        value = 0
+    if value < 1:
+        logging.warning(
+            f"Ignoring invalid AA_HOTEL_CONCURRENCY={raw_value!r}; using {default}."
+        )
+        return default
+    return value
+
+
+# Requests in flight at once; the worker pool is shared by all cities and
+# passes. Override with the AA_HOTEL_CONCURRENCY environment variable.
+FETCH_MAX_WORKERS = _concurrency_from_env(10)
+
+# Connection pool and retry policy for the shared HTTP session
+HTTP_POOL_MAXSIZE = 32
+HTTP_RETRY = Retry(
+    total=3,
+    backoff_factor=0.3,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({"GET", "HEAD"}),
+    raise_on_status=False,
+)
+
+# Place lookups rarely change; cache them across passes and searches, but
+# re-query after an hour so a long-running app picks up catalogue changes
+PLACE_IDS_CACHE_MAX_ENTRIES = 256
+PLACE_IDS_CACHE_TTL_SECONDS = 3600
+# query -> (monotonic time stored, places)
+_PLACE_IDS_CACHE: Dict[str, Tuple[float, Tuple[Tuple[str, str], ...]]] = {}
+_PLACE_IDS_CACHE_LOCK = threading.Lock()
+
+# Pooled session for helper calls made without an explicit session; created on
+# first use. It keeps no cookies, so one caller's cookies never leak into
+# another's requests (credentials come from the per-call session headers).
+_DEFAULT_HTTP_SESSION: Optional[requests.Session] = None
+_DEFAULT_HTTP_SESSION_LOCK = threading.Lock()
+
+# Patterns for parse_curl_command, compiled once at import. The URL and -b
+# patterns accept either quote style in a single scan (group 1 or group 2).
+_CURL_URL_RE = re.compile(r"""curl\s+(?:'([^']*)'|"([^"]*)")""")
+_CURL_HEADER_RE = re.compile(r"-H\s+'([^']*)'")
+_CURL_COOKIE_RE = re.compile(r"""-b\s+(?:'([^']*)'|"([^"]*)")""")
+
 
 def parse_curl_command(curl_command: str) -> Tuple[Optional[str], Dict[str, str]]:
     """
@@ -59,24 +136,26 @@ def parse_curl_command(curl_command: str) -> Tuple[Optional[str], Dict[str, str]
     headers: Dict[str, str] = {}
     url: Optional[str] = None
 
-    url_match = re.search(r"curl\s+'([^']*)'", curl_command)
-    if not url_match:
-        url_match = re.search(r'curl\s+"([^"]*)"', curl_command)
+    url_match = _CURL_URL_RE.search(curl_command)
     if url_match:
-        url = url_match.group(1)
+        url = (
+            url_match.group(1)
+            if url_match.group(1) is not None
+            else url_match.group(2)
+        )
 
-    header_matches = re.findall(r"-H\s+'([^']*)'", curl_command)
-    for header_str in header_matches:
-        if ":" in header_str:
-            name, value = header_str.split(":", 1)
+    for header_str in _CURL_HEADER_RE.findall(curl_command):
+        name, separator, value = header_str.partition(":")
+        if separator:
             headers[name.strip()] = value.strip()
 
-    cookie_match = re.search(r"-b\s+'([^']*)'", curl_command)
-    if not cookie_match:
-        cookie_match = re.search(r'-b\s+"([^"]*)"', curl_command)
-
+    cookie_match = _CURL_COOKIE_RE.search(curl_command)
     if cookie_match:
-        cookie_string = cookie_match.group(1)
+        cookie_string = (
+            cookie_match.group(1)
+            if cookie_match.group(1) is not None
+            else cookie_match.group(2)
+        )
         if "Cookie" in headers:
             logging.warning("Cookie header already found, -b will overwrite it.")
         headers["Cookie"] = cookie_string.strip()
@@ -84,13 +163,106 @@ def parse_curl_command(curl_command: str) -> Tuple[Optional[str], Dict[str, str]
     return url, headers
 
 
+def _without_accept_encoding(session_headers: Dict[str, str]) -> Dict[str, str]:
+    # Browser cURL copies often ask for br/zstd; keep the default
+    # accept-encoding so responses always come back in a form we can decode.
+    return {
+        name: value
+        for name, value in session_headers.items()
+        if name.lower() != "accept-encoding"
+    }
+
+
+def create_http_session(
+    session_headers: Optional[Dict[str, str]] = None,
+    pool_maxsize: int = HTTP_POOL_MAXSIZE,
+) -> requests.Session:
+    """
+    Creates a requests.Session carrying the default and session headers, with a
+    keep-alive connection pool and retries on transient HTTP errors. Share one
+    session across calls so connections (and TLS handshakes) are reused.
+    """
+    session = requests.Session()
+    session.headers.update(DEFAULT_REQUEST_HEADERS)
+    if session_headers:
+        session.headers.update(_without_accept_encoding(session_headers))
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=pool_maxsize, max_retries=HTTP_RETRY
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+def _warm_up_session(session: requests.Session) -> None:
+    # Opens a pooled connection (DNS + TLS) ahead of the first API call. Any
+    # cookies it sets go unused: requests send the session headers' explicit
+    # Cookie header, which takes precedence over the session's cookie jar.
+    try:
+        session.head(AADVANTAGE_HOTELS_SITE_URL, timeout=10, allow_redirects=True)
+    except requests.exceptions.RequestException as e:
+        logging.debug(f"Session warm-up request failed: {e}")
+
+
+def _default_http_session() -> requests.Session:
+    global _DEFAULT_HTTP_SESSION
+    with _DEFAULT_HTTP_SESSION_LOCK:
+        if _DEFAULT_HTTP_SESSION is None:
+            session = create_http_session()
+            session.cookies.set_policy(
+                http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+            )
+            _DEFAULT_HTTP_SESSION = session
+        return _DEFAULT_HTTP_SESSION
+
+
+def _http_get(
+    url: str,
+    session: Optional[requests.Session],
+    session_headers: Optional[Dict[str, str]],
+    **kwargs: Any,
+) -> requests.Response:
+    # A session already carries its headers; otherwise use the shared default
+    # session (default headers) with this call's headers layered on top.
+    if session is not None:
+        return session.get(url, **kwargs)
+    if session_headers:
+        session_headers = _without_accept_encoding(session_headers)
+    return _default_http_session().get(url, headers=session_headers, **kwargs)
+
+
 def discover_place_ids(
-    query: str, session_headers: Optional[Dict[str, str]] = None
+    query: str,
+    session_headers: Optional[Dict[str, str]] = None,
+    session: Optional[requests.Session] = None,
 ) -> List[Tuple[str, str]]:
     """
     Discovers place IDs (primarily AGODA_CITY type) for a given query string.
-    Returns a list of (name, place_id) tuples.
+    Returns a list of (name, place_id) tuples. Successful lookups are cached
+    per query for PLACE_IDS_CACHE_TTL_SECONDS.
     """
+    cache_key = query.strip().lower()
+    with _PLACE_IDS_CACHE_LOCK:
+        cached_entry = _PLACE_IDS_CACHE.get(cache_key)
+    if cached_entry is not None:
+        stored_at, cached_places = cached_entry
+        if time.monotonic() - stored_at < PLACE_IDS_CACHE_TTL_SECONDS:
+            return list(cached_places)
+
+    discovered = _fetch_place_ids(query, session_headers, session)
+    if discovered:  # Failed or empty lookups are retried next time
+        with _PLACE_IDS_CACHE_LOCK:
+            _PLACE_IDS_CACHE.pop(cache_key, None)
+            if len(_PLACE_IDS_CACHE) >= PLACE_IDS_CACHE_MAX_ENTRIES:
+                _PLACE_IDS_CACHE.pop(next(iter(_PLACE_IDS_CACHE)))
+            _PLACE_IDS_CACHE[cache_key] = (time.monotonic(), tuple(discovered))
+    return discovered
+
+
+def _fetch_place_ids(
+    query: str,
+    session_headers: Optional[Dict[str, str]],
+    session: Optional[requests.Session],
+) -> List[Tuple[str, str]]:
     discovered_places: Dict[str, str] = {}
     params = {
         "query": query,
@@ -98,22 +270,15 @@ def discover_place_ids(
         "language": "en",
         "includeHotelNames": "true",
     }
-    request_headers = {
-        "accept": "application/json, text/plain, */*",
-        "accept-language": "en-US,en;q=0.9",
-        "user-agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    }
-    if session_headers:
-        request_headers.update(session_headers)
 
     response = None
     try:
         logging.info(f"Discovering place IDs for query: '{query}'...")
-        response = requests.get(
-            PLACES_API_URL, params=params, headers=request_headers, timeout=10
+        response = _http_get(
+            PLACES_API_URL, session, session_headers, params=params, timeout=10
         )
         response.raise_for_status()
-        places_data = response.json()
+        places_data = _loads_json(response.content)
 
         if not isinstance(places_data, list):
             logging.warning(
@@ -121,15 +286,22 @@ def discover_place_ids(
             )
             return []
 
+        query_folded = query.casefold()
         for place in places_data:
             place_id = place.get("id")
             name = place.get("name")
-            description = place.get("description", "").lower()
             place_type = place.get("type")
 
             if place_id and name:  # name is guaranteed to be a string here
+                name_folded = name.casefold()
                 if place_type == "AGODA_CITY":
-                    if query.lower() in name.lower() or query.lower() in description:
+                    if name_folded == query_folded:
+                        # A city named exactly like the query can't be beaten
+                        return [(name, place_id)]
+                    if (
+                        query_folded in name_folded
+                        or query_folded in place.get("description", "").casefold()
+                    ):
                         # Ensure the value from discovered_places.get is also treated as string for len
                         existing_name_in_dict = discovered_places.get(place_id)
                         default_comparison_len = (
@@ -149,7 +321,7 @@ def discover_place_ids(
                             or current_name_len < len_to_compare
                         ):
                             discovered_places[place_id] = name
-                elif place_type == "AGODA_AREA" and query.lower() in name.lower():
+                elif place_type == "AGODA_AREA" and query_folded in name_folded:
                     existing_name_in_dict_area = discovered_places.get(place_id)
                     current_name_len_area = len(name) if name else 0
 
@@ -194,6 +366,7 @@ def search_aadvantage_hotels(
     children: int = 0,
     rooms: int = 1,
     session_headers: Optional[Dict[str, str]] = None,
+    session: Optional[requests.Session] = None,
 ) -> Optional[str]:
     params = {
         "adults": adults,
@@ -212,21 +385,14 @@ def search_aadvantage_hotels(
         "rooms": rooms,
         "source": "AGODA",
     }
-    encoded_params = urllib.parse.urlencode(params)
-    url = f"{SEARCH_API_BASE_URL}?{encoded_params}"
-    request_headers = {
-        "accept": "application/json, text/plain, */*",
-        "accept-language": "en-US,en;q=0.9",
-        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-    }
-    if session_headers:
-        request_headers.update(session_headers)
     response_obj = None
     search_uuid = None
     try:
-        response_obj = requests.get(url, headers=request_headers, timeout=15)
+        response_obj = _http_get(
+            SEARCH_API_BASE_URL, session, session_headers, params=params, timeout=15
+        )
         response_obj.raise_for_status()
-        data = response_obj.json()
+        data = _loads_json(response_obj.content)
         search_uuid = data.get("uuid")
         if not search_uuid:
             logging.error(
@@ -246,6 +412,7 @@ def get_hotel_results(
     page_size: int = 45,
     page_number: int = 1,
     session_headers: Optional[Dict[str, str]] = None,
+    session: Optional[requests.Session] = None,
 ) -> Optional[Dict[str, Any]]:
     url = f"{RESULTS_API_BASE_URL}/{search_id}"
     params = {
@@ -254,20 +421,11 @@ def get_hotel_results(
         "pageSize": page_size,
         "pageNumber": page_number,
     }
-    encoded_params = urllib.parse.urlencode(params)
-    full_url = f"{url}?{encoded_params}"
-    request_headers = {
-        "accept": "application/json, text/plain, */*",
-        "accept-language": "en-US,en;q=0.9",
-        "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-    }
-    if session_headers:
-        request_headers.update(session_headers)
     response = None
     try:
-        response = requests.get(full_url, headers=request_headers, timeout=20)
+        response = _http_get(url, session, session_headers, params=params, timeout=20)
         response.raise_for_status()
-        return response.json()
+        return _loads_json(response.content)
     except requests.exceptions.RequestException as e:
         logging.error(f"Error getting hotel results for search ID {search_id}: {e}")
     except json.JSONDecodeError:
@@ -277,6 +435,12 @@ def get_hotel_results(
     return None
 
 
+@functools.lru_cache(maxsize=4096)
+def _mdy_to_ordinal(date_str: str) -> int:
+    # Every city searched on a date parses the same MM/DD/YYYY string
+    return datetime.strptime(date_str, "%m/%d/%Y").toordinal()
+
+
 def analyze_hotel_data(
     search_results_data: Dict[str, Any],
     location_name: str,
@@ -294,24 +458,30 @@ def analyze_hotel_data(
     if not isinstance(results, list):
         return hotels_value
 
+    # Per-call invariants, hoisted out of the per-hotel loop below.
+    # The ordinal gives selectors a cheap integer sort/lookup key for the date.
+    check_in_ordinal = _mdy_to_ordinal(check_in_date_str)
+    no_details: Dict[str, Any] = {}
+    append_hotel_value = hotels_value.append
+
     for hotel_data_item in results:
-        hotel_details = hotel_data_item.get("hotel", {})
+        hotel_details = hotel_data_item.get("hotel", no_details)
         hotel_name = hotel_details.get("name", "Unknown Hotel")
         total_price = hotel_data_item.get(
-            "grandTotalPublishedPriceInclusiveWithFees", {}
+            "grandTotalPublishedPriceInclusiveWithFees", no_details
         ).get("amount", 0.0)
         api_points_earned = hotel_data_item.get("rewards", 0)
 
-        card_lp_bonus_points = 0
-        card_miles_bonus_from_spend = 0
-        actual_card_miles_rate_applied = 0
-
         if aa_card_bonus and total_price > 0:
-            card_lp_bonus_points = int(round(total_price * 1))  # 1x LP on spend
+            card_lp_bonus_points = int(round(total_price))  # 1x LP on spend
             card_miles_bonus_from_spend = int(
                 round(total_price * aa_card_miles_rate)
             )  # 1x or 10x miles on spend
             actual_card_miles_rate_applied = aa_card_miles_rate
+        else:
+            card_lp_bonus_points = 0
+            card_miles_bonus_from_spend = 0
+            actual_card_miles_rate_applied = 0
 
         points_earned_initial = api_points_earned + card_lp_bonus_points
         points_per_dollar_initial = (
@@ -322,11 +492,12 @@ def analyze_hotel_data(
         initial_miles_earned = api_points_earned + card_miles_bonus_from_spend
         initial_miles_value = initial_miles_earned * miles_value_rate  # Use parameter
 
-        hotels_value.append(
+        append_hotel_value(
             {
                 "name": hotel_name,
                 "location": location_name,
                 "check_in_date": check_in_date_str,
+                "check_in_ordinal": check_in_ordinal,
                 "total_price": total_price,
                 "api_points_earned": api_points_earned,
                 "card_bonus_points": card_lp_bonus_points,  # LP from card
@@ -347,117 +518,110 @@ def analyze_hotel_data(
     return hotels_value
 
 
+def _summary_lp_ppd(hotel: Dict[str, Any]) -> float:
+    # Stays from analyze_hotel_data carry the *_final_for_itinerary fields;
+    # plain stay dicts fall back to their base values.
+    return hotel.get(
+        "points_per_dollar_final_for_itinerary", hotel.get("points_per_dollar", 0)
+    )
+
+
+def _summary_lp(hotel: Dict[str, Any]) -> int:
+    return hotel.get("points_earned_final_for_itinerary", hotel.get("points_earned", 0))
+
+
 def print_hotel_values_summary(hotels_value: List[Dict[str, Any]], limit: int = 20):
     if not hotels_value:
         results_logger.info("No hotel values to display.")
         return
-    hotels_value.sort(
-        key=lambda x: (
-            x.get(
-                "points_per_dollar_final_for_itinerary", x.get("points_per_dollar", 0)
-            ),
-            -x["total_price"],
-        ),
-        reverse=True,
+    # Best final PPD first, cheaper first on ties. Only the top rows are shown,
+    # so keep a bounded heap instead of sorting (and reordering) the caller's
+    # whole list.
+    top_hotels = heapq.nlargest(
+        limit,
+        hotels_value,
+        key=lambda x: (_summary_lp_ppd(x), -x["total_price"]),
     )
+    header = f"{'Hotel Name':<35} {'Loc':<15} {'Date':<10} {'Price':<8} {'LP':<8} {'LP PPD':<7} {'Miles':<8} {'Val($)':<7} {'Refund':<8}"
+    summary_lines = [
+        "\n===== Top AAdvantage Points Value Hotels (Based on LP PPD) =====",
+        header,
+        "=" * len(header),
+    ]
+    summary_lines.extend(
+        f"{hotel['name']:<35.35} {hotel['location']:<15.15} {hotel['check_in_date']:<10} "
+        f"${hotel['total_price']:<7.2f} {_summary_lp(hotel):<8} "
+        f"{_summary_lp_ppd(hotel):<7.2f} "
+        f"{hotel.get('miles_earned', 0):<8} ${hotel.get('miles_value', 0.0):<6.2f} "
+        f"{hotel['refundability'] == 'REFUNDABLE'!s:<8}"
+        for hotel in top_hotels
+    )
+    # One logging call (one lock and one write) for the whole table.
+    results_logger.info("\n".join(summary_lines))
+    if not top_hotels:
+        return
+    best_overall_value = top_hotels[0]
     results_logger.info(
-        "\n===== Top AAdvantage Points Value Hotels (Based on LP PPD) ====="
+        "\n🏆 OVERALL BEST SINGLE STAY VALUE (from this batch, considering all bonuses):\n"
+        f"{best_overall_value['name']} in {best_overall_value['location']} on {best_overall_value['check_in_date']}\n"
+        f"  Offers {_summary_lp_ppd(best_overall_value):.2f} LP per dollar. "
+        f"Pay ${best_overall_value['total_price']:.2f}, earn {_summary_lp(best_overall_value)} LP.\n"
+        f"  Also earns {best_overall_value.get('miles_earned', 0)} miles, valued at ${best_overall_value.get('miles_value', 0.0):.2f}."
     )
-    header = f"{'Hotel Name':<35} {'Loc':<15} {'Date':<10} {'Price':<8} {'LP':<8} {'LP PPD':<7} {'Miles':<8} {'Val($)':<7} {'Refund':<8}"
-    results_logger.info(header)
-    results_logger.info("=" * len(header))
-    for i, hotel in enumerate(hotels_value):
-        if i >= limit:
-            break
-        final_lp = hotel.get(
-            "points_earned_final_for_itinerary", hotel.get("points_earned")
-        )
-        final_lp_ppd = hotel.get(
-            "points_per_dollar_final_for_itinerary", hotel.get("points_per_dollar")
-        )
-        miles_earned_display = hotel.get("miles_earned", 0)
-        miles_value_display = hotel.get("miles_value", 0.0)
-        results_logger.info(
-            f"{hotel['name']:<35.35} {hotel['location']:<15.15} {hotel['check_in_date']:<10} "
-            f"${hotel['total_price']:<7.2f} {final_lp:<8} "
-            f"{final_lp_ppd:<7.2f} {miles_earned_display:<8} ${miles_value_display:<6.2f} "
-            f"{hotel['refundability'] == 'REFUNDABLE'!s:<8}"
-        )
-    if hotels_value:
-        best_overall_value = hotels_value[0]
-        final_lp_best = best_overall_value.get(
-            "points_earned_final_for_itinerary", best_overall_value.get("points_earned")
-        )
-        final_lp_ppd_best = best_overall_value.get(
-            "points_per_dollar_final_for_itinerary",
-            best_overall_value.get("points_per_dollar"),
-        )
-        miles_earned_best = best_overall_value.get("miles_earned", 0)
-        miles_value_best = best_overall_value.get("miles_value", 0.0)
-
-        results_logger.info(
-            "\n🏆 OVERALL BEST SINGLE STAY VALUE (from this batch, considering all bonuses):"
-        )
-        results_logger.info(
-            f"{best_overall_value['name']} in {best_overall_value['location']} on {best_overall_value['check_in_date']}"
-        )
-        results_logger.info(
-            f"  Offers {final_lp_ppd_best:.2f} LP per dollar. Pay ${best_overall_value['total_price']:.2f}, earn {final_lp_best} LP."
-        )
-        results_logger.info(
-            f"  Also earns {miles_earned_best} miles, valued at ${miles_value_best:.2f}."
-        )
 
 
 def generate_date_range(start_date: date, end_date: date) -> List[date]:
-    dates: List[date] = []
-    current_date = start_date
-    while current_date <= end_date:
-        dates.append(current_date)
-        current_date += timedelta(days=1)
-    return dates
+    # Inclusive range; empty if end_date is before start_date
+    return [
+        date.fromordinal(ordinal)
+        for ordinal in range(start_date.toordinal(), end_date.toordinal() + 1)
+    ]
+
+
+# (name, location, check-in date, price) of a stay, built in C; every record
+# from analyze_hotel_data carries these fields.
+_stay_dedup_key = itemgetter("name", "location", "check_in_date", "total_price")
+
+# AAdvantage status bonus on base hotel points, keyed by the LP balance
+# reached before the stay. Checked highest threshold first.
+STATUS_BONUS_TIERS: Tuple[Tuple[int, float], ...] = ((100000, 0.30), (60000, 0.20))
+
+# DP cost (in cents) of a points total no stay combination reaches. Half of
+# int64 max, so adding any stay's price to it cannot overflow.
+_DP_UNREACHABLE_COST = np.iinfo(np.int64).max // 2
+
+
+def _status_bonus_percentage(projected_lp_before_stay: int) -> float:
+    for threshold, percentage in STATUS_BONUS_TIERS:
+        if projected_lp_before_stay >= threshold:
+            return percentage
+    return 0.0
 
 
 def _apply_status_bonus_and_recalculate(
     stay: Dict[str, Any], projected_lp_before_stay: int, miles_value_rate: float = 0.015
 ) -> Dict[str, Any]:  # Added miles_value_rate
-    current_stay = stay.copy()
-    # MILES_VALUE_RATE = 0.015 # Replaced by parameter
-    status_bonus_percentage = 0
-    if projected_lp_before_stay >= 100000:
-        status_bonus_percentage = 0.30
-    elif projected_lp_before_stay >= 60000:
-        status_bonus_percentage = 0.20
-
-    base_hotel_points = current_stay["api_points_earned"]
-    status_bonus_points = int(round(base_hotel_points * status_bonus_percentage))
-
-    current_stay["status_bonus_points"] = status_bonus_points
-    base_lp_for_final_calc = current_stay["points_earned"]
-    current_stay["points_earned_final_for_itinerary"] = (
-        base_lp_for_final_calc + status_bonus_points
-    )
-
-    if current_stay["total_price"] > 0:
-        current_stay["points_per_dollar_final_for_itinerary"] = (
-            current_stay["points_earned_final_for_itinerary"]
-            / current_stay["total_price"]
+    status_bonus_points = int(
+        round(
+            stay["api_points_earned"]
+            * _status_bonus_percentage(projected_lp_before_stay)
         )
-    else:
-        current_stay["points_per_dollar_final_for_itinerary"] = 0
-
-    # Initial miles (base + card spend miles) are already in current_stay["miles_earned"]
-    # Status bonus LPs also count as miles
-    final_miles_earned_for_stay = current_stay["miles_earned"] + status_bonus_points
-
-    current_stay["miles_earned"] = (
-        final_miles_earned_for_stay  # This now includes status bonus
     )
-    current_stay["miles_value"] = (
-        final_miles_earned_for_stay * miles_value_rate
-    )  # Use parameter
-
-    return current_stay
+    points_earned_final = stay["points_earned"] + status_bonus_points
+    total_price = stay["total_price"]
+    # Status bonus LPs also count as miles on top of base + card spend miles
+    final_miles_earned_for_stay = stay["miles_earned"] + status_bonus_points
+
+    return {
+        **stay,
+        "status_bonus_points": status_bonus_points,
+        "points_earned_final_for_itinerary": points_earned_final,
+        "points_per_dollar_final_for_itinerary": (
+            points_earned_final / total_price if total_price > 0 else 0
+        ),
+        "miles_earned": final_miles_earned_for_stay,  # Includes status bonus
+        "miles_value": final_miles_earned_for_stay * miles_value_rate,
+    }
 
 
 def select_optimal_stays_ppd(
@@ -470,25 +634,25 @@ def select_optimal_stays_ppd(
     if not candidate_stays_orig:
         return [], 0.0, 0
 
+    # Best PPD first, cheaper first on ties: stable sorts on C-level keys,
+    # least significant key first.
     sorted_initial_candidates = sorted(
-        candidate_stays_orig,
-        key=lambda x: (
-            x.get("points_per_dollar", 0),
-            -x.get("total_price", float("inf")),
-        ),
-        reverse=True,
+        candidate_stays_orig, key=itemgetter("total_price")
     )
+    sorted_initial_candidates.sort(key=itemgetter("points_per_dollar"), reverse=True)
 
     selected_itinerary: List[Dict[str, Any]] = []
     projected_cumulative_lp = current_lp_balance
     current_total_cost = 0.0
-    booked_dates: set[str] = set()
+    # Booked nights as bits of an int, offset from the earliest candidate date.
+    first_ordinal = min(s["check_in_ordinal"] for s in candidate_stays_orig)
+    booked_dates_mask = 0
 
     for stay_data in sorted_initial_candidates:
         if projected_cumulative_lp >= target_points:
             break
-        check_in_str = stay_data["check_in_date"]
-        if check_in_str in booked_dates:
+        date_bit = 1 << (stay_data["check_in_ordinal"] - first_ordinal)
+        if booked_dates_mask & date_bit:
             continue
         current_stay_with_bonus = _apply_status_bonus_and_recalculate(
             stay_data, projected_cumulative_lp, miles_value_rate
@@ -498,14 +662,10 @@ def select_optimal_stays_ppd(
             "points_earned_final_for_itinerary"
         ]
         current_total_cost += current_stay_with_bonus["total_price"]
-        booked_dates.add(check_in_str)
+        booked_dates_mask |= date_bit
 
-    final_achieved_points = sum(
-        s["points_earned_final_for_itinerary"] for s in selected_itinerary
-    )
-    selected_itinerary.sort(
-        key=lambda x: datetime.strptime(x["check_in_date"], "%m/%d/%Y")
-    )
+    final_achieved_points = projected_cumulative_lp - current_lp_balance
+    selected_itinerary.sort(key=lambda x: x["check_in_ordinal"])
     return selected_itinerary, current_total_cost, final_achieved_points
 
 
@@ -523,25 +683,26 @@ def select_cheapest_stays_for_target_lp(
     if not candidate_stays_orig:
         return [], 0.0, 0
 
+    # Cheapest first, then more LP, then check-in date: stable sorts on
+    # C-level keys, least significant key first.
     sorted_initial_candidates = sorted(
-        candidate_stays_orig,
-        key=lambda x: (
-            x["total_price"],
-            -x.get("points_earned", 0),
-            x["check_in_date"],
-        ),
+        candidate_stays_orig, key=itemgetter("check_in_date")
     )
+    sorted_initial_candidates.sort(key=itemgetter("points_earned"), reverse=True)
+    sorted_initial_candidates.sort(key=itemgetter("total_price"))
 
     selected_itinerary: List[Dict[str, Any]] = []
     projected_cumulative_lp = current_lp_balance
     current_total_cost = 0.0
-    booked_dates: set[str] = set()
+    # Booked nights as bits of an int, offset from the earliest candidate date.
+    first_ordinal = min(s["check_in_ordinal"] for s in candidate_stays_orig)
+    booked_dates_mask = 0
 
     for stay_data in sorted_initial_candidates:
         if projected_cumulative_lp >= target_points:
             break
-        check_in_str = stay_data["check_in_date"]
-        if check_in_str in booked_dates:
+        date_bit = 1 << (stay_data["check_in_ordinal"] - first_ordinal)
+        if booked_dates_mask & date_bit:
             continue
         current_stay_with_bonus = _apply_status_bonus_and_recalculate(
             stay_data, projected_cumulative_lp, miles_value_rate
@@ -551,14 +712,10 @@ def select_cheapest_stays_for_target_lp(
             "points_earned_final_for_itinerary"
         ]
         current_total_cost += current_stay_with_bonus["total_price"]
-        booked_dates.add(check_in_str)
+        booked_dates_mask |= date_bit
 
-    final_achieved_points = sum(
-        s["points_earned_final_for_itinerary"] for s in selected_itinerary
-    )
-    selected_itinerary.sort(
-        key=lambda x: datetime.strptime(x["check_in_date"], "%m/%d/%Y")
-    )
+    final_achieved_points = projected_cumulative_lp - current_lp_balance
+    selected_itinerary.sort(key=lambda x: x["check_in_ordinal"])
     if final_achieved_points < target_points:
         logging.warning(
             f"Greedy cheapest stays could not meet target {target_points} LP. Achieved {final_achieved_points} LP."
@@ -593,35 +750,28 @@ def select_fastest_calendar_time_lp(
     if not candidate_stays_with_initial_bonus:
         return [], 0.0, current_lp_balance
 
-    unique_checkout_dates: List[date] = sorted(
-        list(
-            set(
-                datetime.strptime(s["check_in_date"], "%m/%d/%Y").date()
-                + timedelta(days=1)
-                for s in candidate_stays_with_initial_bonus
-            )
-        )
+    # Dates are compared as ordinals; a one-night stay checks out the day after.
+    unique_checkout_ordinals: List[int] = sorted(
+        {s["check_in_ordinal"] + 1 for s in candidate_stays_with_initial_bonus}
+    )
+
+    # Most LP first, then cheaper. Sorted once; filtering by completion date
+    # below keeps this order, so each pass needs no re-sort.
+    candidate_stays_with_initial_bonus.sort(key=itemgetter("total_price"))
+    candidate_stays_with_initial_bonus.sort(
+        key=itemgetter("points_earned_final_for_itinerary"), reverse=True
     )
 
-    for potential_completion_date in unique_checkout_dates:
+    for potential_completion_ordinal in unique_checkout_ordinals:
         stays_ending_by_date = [
             s
             for s in candidate_stays_with_initial_bonus
-            if datetime.strptime(s["check_in_date"], "%m/%d/%Y").date()
-            < potential_completion_date
+            if s["check_in_ordinal"] < potential_completion_ordinal
         ]
 
         if not stays_ending_by_date:
             continue
 
-        stays_ending_by_date.sort(
-            key=lambda x: (
-                x.get("points_earned_final_for_itinerary", 0),
-                -x.get("total_price", float("inf")),
-            ),
-            reverse=True,
-        )
-
         selected_itinerary: List[Dict[str, Any]] = []
         current_total_cost = 0.0
         # Relative LP needed from new stays
@@ -630,32 +780,27 @@ def select_fastest_calendar_time_lp(
             return [], 0.0, current_lp_balance
 
         accumulated_lp_from_new_stays = 0
+        booked_count_per_ordinal: Dict[int, int] = {}
 
         for stay_to_consider in stays_ending_by_date:
             if accumulated_lp_from_new_stays >= relative_lp_needed:
                 break
 
-            can_add_stay = True
-            if max_overlaps is not None and max_overlaps > 0:
-                num_existing_overlaps_for_this_date = 0
-                stay_check_in_date_obj = datetime.strptime(
-                    stay_to_consider["check_in_date"], "%m/%d/%Y"
-                ).date()
-
-                for existing_stay_in_itinerary in selected_itinerary:
-                    existing_stay_check_in_date_obj = datetime.strptime(
-                        existing_stay_in_itinerary["check_in_date"], "%m/%d/%Y"
-                    ).date()
-                    if existing_stay_check_in_date_obj == stay_check_in_date_obj:
-                        num_existing_overlaps_for_this_date += 1
-
-                if num_existing_overlaps_for_this_date >= max_overlaps:
-                    can_add_stay = False
-
-            if not can_add_stay:
+            stay_check_in_ordinal = stay_to_consider["check_in_ordinal"]
+            num_existing_overlaps_for_this_date = booked_count_per_ordinal.get(
+                stay_check_in_ordinal, 0
+            )
+            if (
+                max_overlaps is not None
+                and max_overlaps > 0
+                and num_existing_overlaps_for_this_date >= max_overlaps
+            ):
                 continue  # Skip this stay as it would exceed max_overlaps
 
             selected_itinerary.append(stay_to_consider)
+            booked_count_per_ordinal[stay_check_in_ordinal] = (
+                num_existing_overlaps_for_this_date + 1
+            )
             current_total_cost += stay_to_consider["total_price"]
             accumulated_lp_from_new_stays += stay_to_consider[
                 "points_earned_final_for_itinerary"
@@ -663,10 +808,7 @@ def select_fastest_calendar_time_lp(
 
         if accumulated_lp_from_new_stays >= relative_lp_needed:
             selected_itinerary.sort(
-                key=lambda x: (
-                    datetime.strptime(x["check_in_date"], "%m/%d/%Y"),
-                    x.get("name"),
-                )
+                key=lambda x: (x["check_in_ordinal"], x.get("name"))
             )
             final_achieved_lp_overall = (
                 current_lp_balance + accumulated_lp_from_new_stays
@@ -679,6 +821,86 @@ def select_fastest_calendar_time_lp(
     return [], 0.0, current_lp_balance
 
 
+def _min_cost_knapsack(
+    stay_costs_cents: np.ndarray,
+    stay_points: np.ndarray,
+    target_points: int,
+    max_points: int,
+) -> Optional[List[int]]:
+    """
+    Returns the indices of the cheapest stays whose points sum to at least
+    target_points (and at most max_points), or None if no such set exists.
+    Costs are integer cents, so equal-cost paths compare exactly. Among
+    equal-cost sets the one with the most points wins, then the one with
+    fewer stays.
+    """
+    # 0/1 knapsack over points: dp_min_cost[p] is the cheapest way to earn
+    # exactly p points. Each stay relaxes the whole row in one vectorised step;
+    # the right-hand side is computed from the previous row before anything is
+    # written, so a stay is never counted twice. taken_rows[idx][p - s_points]
+    # records whether stay idx improved cell p, for backtracking afterwards.
+    dp_min_cost = np.full(max_points + 1, _DP_UNREACHABLE_COST, dtype=np.int64)
+    dp_min_cost[0] = 0
+    dp_stay_count = np.zeros(max_points + 1, dtype=np.int64)
+    taken_rows: List[Optional[np.ndarray]] = [None] * len(stay_costs_cents)
+
+    for idx in range(len(stay_costs_cents)):
+        s_points = int(stay_points[idx])
+        if s_points <= 0 or s_points > max_points:
+            continue
+
+        cost_if_taken = dp_min_cost[:-s_points] + stay_costs_cents[idx]
+        count_if_taken = dp_stay_count[:-s_points] + 1
+        current_cost = dp_min_cost[s_points:]
+        # Prefer the cheaper path; on equal cost prefer fewer stays.
+        improved = (cost_if_taken < current_cost) | (
+            (cost_if_taken == current_cost)
+            & (cost_if_taken < _DP_UNREACHABLE_COST)
+            & (count_if_taken < dp_stay_count[s_points:])
+        )
+        current_cost[improved] = cost_if_taken[improved]
+        dp_stay_count[s_points:][improved] = count_if_taken[improved]
+        taken_rows[idx] = improved
+
+    # The points of the stays behind dp cell p sum to exactly p, so among
+    # equal-cost cells the highest p is the one earning the most points.
+    reachable_costs = dp_min_cost[target_points:]
+    if reachable_costs.size == 0:
+        return None
+    min_total_cost = reachable_costs.min()
+    if min_total_cost >= _DP_UNREACHABLE_COST:
+        return None
+
+    p = target_points + int(np.flatnonzero(reachable_costs == min_total_cost)[-1])
+    selected_indices: List[int] = []
+    for idx in range(len(stay_costs_cents) - 1, -1, -1):
+        taken_row = taken_rows[idx]
+        s_points = int(stay_points[idx])
+        if taken_row is not None and p >= s_points and taken_row[p - s_points]:
+            selected_indices.append(idx)
+            p -= s_points
+    return selected_indices
+
+
+def _max_lp_one_stay_per_date(
+    all_stays: List[Dict[str, Any]], current_lp_balance: int = 0
+) -> int:
+    """
+    LP reached by booking the highest-LP stay on every date (before status
+    bonus). select_optimal_stays_dp finds an itinerary for a target exactly
+    when this reaches it, so it is an O(N) stand-in for running the DP.
+    """
+    best_points_per_date: Dict[int, int] = {}
+    for stay in all_stays:
+        points_earned = stay.get("points_earned", 0)
+        if points_earned <= 0 or stay.get("total_price", 0) <= 0:
+            continue
+        date_key = stay["check_in_ordinal"]
+        if points_earned > best_points_per_date.get(date_key, 0):
+            best_points_per_date[date_key] = points_earned
+    return current_lp_balance + sum(best_points_per_date.values())
+
+
 def select_optimal_stays_dp(
     all_stays: List[Dict[str, Any]],
     target_points: int,
@@ -688,24 +910,23 @@ def select_optimal_stays_dp(
     if not all_stays or target_points <= 0:
         return [], 0.0, current_lp_balance if target_points <= 0 else 0
 
-    best_initial_stay_per_date: Dict[str, Dict[str, Any]] = {}
-    for s_orig in all_stays:
-        stay = s_orig.copy()
-        if stay.get("points_earned", 0) <= 0 or stay.get("total_price", 0) <= 0:
+    # One candidate per date: the most points, then the lower price. Stays on
+    # different dates are separate 0/1 items that can be combined, so a stay
+    # that looks dominated by one on another date may still be needed.
+    # Only same-date alternatives can be dropped safely.
+    best_initial_stay_per_date: Dict[int, Dict[str, Any]] = {}
+    best_rank_per_date: Dict[int, Tuple[int, float]] = {}
+    for stay in all_stays:
+        points_earned = stay.get("points_earned", 0)
+        total_price = stay.get("total_price", 0)
+        if points_earned <= 0 or total_price <= 0:
             continue
-        date_str = stay["check_in_date"]
-        if (
-            date_str not in best_initial_stay_per_date
-            or stay["points_earned"]
-            > best_initial_stay_per_date[date_str]["points_earned"]
-            or (
-                stay["points_earned"]
-                == best_initial_stay_per_date[date_str]["points_earned"]
-                and stay["total_price"]
-                < best_initial_stay_per_date[date_str]["total_price"]
-            )
-        ):
-            best_initial_stay_per_date[date_str] = stay
+        date_key = stay["check_in_ordinal"]
+        rank = (points_earned, -total_price)
+        best_rank = best_rank_per_date.get(date_key)
+        if best_rank is None or rank > best_rank:
+            best_rank_per_date[date_key] = rank
+            best_initial_stay_per_date[date_key] = stay
 
     candidate_stays_for_dp = list(best_initial_stay_per_date.values())
 
@@ -717,6 +938,25 @@ def select_optimal_stays_dp(
     if relative_target_points == 0:
         return [], 0.0, current_lp_balance
 
+    # A stay that covers the whole target on its own makes any other stay in
+    # the same set pure extra cost, so of those only the cheapest can be part
+    # of an optimal itinerary. Dropping the rest shrinks the DP's item count.
+    covering_stays = [
+        s for s in candidate_stays_for_dp
+        if s["points_earned"] >= relative_target_points
+    ]
+    if len(covering_stays) > 1:
+        # Same order as _min_cost_knapsack: fewer cents, then more points
+        cheapest_covering_stay = min(
+            covering_stays,
+            key=lambda s: (round(s["total_price"] * 100), -s["points_earned"]),
+        )
+        candidate_stays_for_dp = [
+            s for s in candidate_stays_for_dp
+            if s["points_earned"] < relative_target_points
+            or s is cheapest_covering_stay
+        ]
+
     max_initial_points_for_dp_range = max(
         (s.get("points_earned", 0) for s in candidate_stays_for_dp), default=0
     )
@@ -727,66 +967,35 @@ def select_optimal_stays_dp(
     if max_dp_points_range <= 0:
         max_dp_points_range = relative_target_points
 
-    dp_min_cost = [float("inf")] * (max_dp_points_range + 1)
-    dp_itinerary_indices = [[] for _ in range(max_dp_points_range + 1)]
-    dp_min_cost[0] = 0.0
-
-    for idx, stay_dp_data in enumerate(candidate_stays_for_dp):
-        s_cost = stay_dp_data["total_price"]
-        s_points = stay_dp_data["points_earned"]
-        if s_points <= 0:
-            continue
+    # Columnar copies of the two DP inputs, filled straight from the records.
+    # Prices go in as integer cents so cost sums and ties are exact.
+    num_candidates = len(candidate_stays_for_dp)
+    stay_costs_cents = np.fromiter(
+        (round(s["total_price"] * 100) for s in candidate_stays_for_dp),
+        dtype=np.int64,
+        count=num_candidates,
+    )
+    stay_points = np.fromiter(
+        (s["points_earned"] for s in candidate_stays_for_dp),
+        dtype=np.int64,
+        count=num_candidates,
+    )
 
-        for p in range(max_dp_points_range, s_points - 1, -1):
-            if dp_min_cost[p - s_points] != float("inf"):
-                cost_if_taken = dp_min_cost[p - s_points] + s_cost
-                if cost_if_taken < dp_min_cost[p]:
-                    dp_min_cost[p] = cost_if_taken
-                    dp_itinerary_indices[p] = list(
-                        dp_itinerary_indices[p - s_points]
-                    ) + [idx]
-                elif cost_if_taken == dp_min_cost[p] and len(
-                    dp_itinerary_indices[p - s_points]
-                ) + 1 < len(dp_itinerary_indices[p]):
-                    dp_itinerary_indices[p] = list(
-                        dp_itinerary_indices[p - s_points]
-                    ) + [idx]
-
-    best_itinerary_indices_from_dp = []
-    min_total_cost_from_dp = float("inf")
-
-    for p_relative in range(relative_target_points, max_dp_points_range + 1):
-        if dp_min_cost[p_relative] < min_total_cost_from_dp:
-            min_total_cost_from_dp = dp_min_cost[p_relative]
-            best_itinerary_indices_from_dp = dp_itinerary_indices[p_relative]
-        elif dp_min_cost[p_relative] == min_total_cost_from_dp:
-            current_path_points = sum(
-                candidate_stays_for_dp[i]["points_earned"]
-                for i in dp_itinerary_indices[p_relative]
-            )
-            best_path_points = (
-                sum(
-                    candidate_stays_for_dp[i]["points_earned"]
-                    for i in best_itinerary_indices_from_dp
-                )
-                if best_itinerary_indices_from_dp
-                else 0
-            )
-            if current_path_points > best_path_points:
-                best_itinerary_indices_from_dp = dp_itinerary_indices[p_relative]
+    selected_indices = _min_cost_knapsack(
+        stay_costs_cents,
+        stay_points,
+        relative_target_points,
+        max_dp_points_range,
+    )
 
-    if min_total_cost_from_dp == float("inf"):
+    if selected_indices is None:
         logging.info(
             f"DP could not achieve relative target of {relative_target_points} LP."
         )
         return [], 0.0, current_lp_balance
 
-    temp_selected_stays = [
-        candidate_stays_for_dp[i] for i in best_itinerary_indices_from_dp
-    ]
-    temp_selected_stays.sort(
-        key=lambda x: datetime.strptime(x["check_in_date"], "%m/%d/%Y")
-    )
+    temp_selected_stays = [candidate_stays_for_dp[i] for i in selected_indices]
+    temp_selected_stays.sort(key=lambda x: x["check_in_ordinal"])
 
     final_itinerary_with_status_bonus: List[Dict[str, Any]] = []
     projected_cumulative_lp_for_final_calc = current_lp_balance
@@ -812,52 +1021,132 @@ def select_optimal_stays_dp(
     return final_itinerary_with_status_bonus, final_total_cost, final_achieved_total_lp
 
 
-def fetch_data_for_date(
+def start_search_for_date(
     current_date: date,
     actual_location_name_used: str,
     target_place_id: str,
     session_headers: Dict[str, str],
-    aa_card_bonus: bool = False,
-    aa_card_miles_rate: int = 1,  # Added parameter
-    miles_value_rate: float = 0.015,  # New parameter
-) -> List[Dict[str, Any]]:
+    session: Optional[requests.Session] = None,
+) -> Optional[str]:
     check_in_date_str = current_date.strftime("%m/%d/%Y")
     check_out_date_str = (current_date + timedelta(days=1)).strftime("%m/%d/%Y")
-    hotel_stays_on_date: List[Dict[str, Any]] = []
-
     search_uuid = search_aadvantage_hotels(
         check_in_date_str,
         check_out_date_str,
         actual_location_name_used,
         target_place_id,
         session_headers=session_headers,
+        session=session,
     )
-
-    if search_uuid:
-        results_data = get_hotel_results(
-            search_uuid,
-            actual_location_name_used,
-            check_in_date_str,
-            session_headers=session_headers,
-        )
-        if results_data:
-            hotel_stays_on_date = analyze_hotel_data(
-                results_data,
-                actual_location_name_used,
-                check_in_date_str,
-                aa_card_bonus=aa_card_bonus,
-                aa_card_miles_rate=aa_card_miles_rate,  # Pass down
-                miles_value_rate=miles_value_rate,  # Pass down
-            )
-        else:
-            logging.warning(
-                f"Failed to get hotel results for {actual_location_name_used} on {check_in_date_str} (Search ID: {search_uuid})"
-            )
-    else:
+    if not search_uuid:
         logging.warning(
             f"Failed to initiate search for {actual_location_name_used} on {check_in_date_str}"
         )
-    return hotel_stays_on_date
+    return search_uuid
+
+
+def fetch_results_for_date(
+    search_uuid: str,
+    current_date: date,
+    actual_location_name_used: str,
+    session_headers: Dict[str, str],
+    aa_card_bonus: bool = False,
+    aa_card_miles_rate: int = 1,
+    miles_value_rate: float = 0.015,
+    session: Optional[requests.Session] = None,
+) -> List[Dict[str, Any]]:
+    check_in_date_str = current_date.strftime("%m/%d/%Y")
+    results_data = get_hotel_results(
+        search_uuid,
+        actual_location_name_used,
+        check_in_date_str,
+        session_headers=session_headers,
+        session=session,
+    )
+    if not results_data:
+        logging.warning(
+            f"Failed to get hotel results for {actual_location_name_used} on {check_in_date_str} (Search ID: {search_uuid})"
+        )
+        return []
+    return analyze_hotel_data(
+        results_data,
+        actual_location_name_used,
+        check_in_date_str,
+        aa_card_bonus=aa_card_bonus,
+        aa_card_miles_rate=aa_card_miles_rate,  # Pass down
+        miles_value_rate=miles_value_rate,  # Pass down
+    )
+
+
+def fetch_data_for_date(
+    current_date: date,
+    actual_location_name_used: str,
+    target_place_id: str,
+    session_headers: Dict[str, str],
+    aa_card_bonus: bool = False,
+    aa_card_miles_rate: int = 1,  # Added parameter
+    miles_value_rate: float = 0.015,  # New parameter
+    session: Optional[requests.Session] = None,
+) -> List[Dict[str, Any]]:
+    search_uuid = start_search_for_date(
+        current_date,
+        actual_location_name_used,
+        target_place_id,
+        session_headers,
+        session,
+    )
+    if not search_uuid:
+        return []
+    return fetch_results_for_date(
+        search_uuid,
+        current_date,
+        actual_location_name_used,
+        session_headers,
+        aa_card_bonus,
+        aa_card_miles_rate,
+        miles_value_rate,
+        session,
+    )
+
+
+def _resolve_place_id(
+    city_query: str,
+    session_headers: Dict[str, str],
+    session: Optional[requests.Session] = None,
+) -> Tuple[str, Optional[str]]:
+    """
+    Chooses which discovered place to search for a city query, preferring
+    AGODA_CITY results whose name contains the query. Returns
+    (location name, place ID); the place ID is None if nothing was found.
+    """
+    discovered_locations = discover_place_ids(
+        query=city_query,
+        session_headers=session_headers,
+        session=session,
+    )
+    if not discovered_locations:
+        return city_query, None
+
+    best_city_match: Optional[Tuple[str, str]] = None
+    for name, place_id_val in discovered_locations:
+        if "AGODA_CITY" in place_id_val.upper():
+            if city_query.lower() in name.lower():
+                if best_city_match is None or len(name) < len(best_city_match[0]):
+                    best_city_match = (name, place_id_val)
+            elif best_city_match is None:
+                best_city_match = (name, place_id_val)
+
+    if best_city_match:
+        logging.info(
+            f"Selected place ID for '{best_city_match[0]}': {best_city_match[1]}"
+        )
+        return best_city_match
+
+    location_name, place_id = discovered_locations[0]
+    logging.warning(
+        f"Using first discovered place ID as fallback for '{city_query}': {place_id} ({location_name})"
+    )
+    return location_name, place_id
 
 
 def find_best_hotel_deals(
@@ -884,287 +1173,346 @@ def find_best_hotel_deals(
     current_search_pass_start_date = start_date
     current_search_pass_end_date = end_date
 
+    # Dedup keys of everything in all_hotel_options_global, kept across passes
+    seen_hotel_keys: set[Tuple[str, str, str, float]] = set()
+
     max_iterations_passes = 12
     current_iteration_pass = 0
     absolute_max_end_date_for_search = start_date + timedelta(
         days=max_search_days_iterative
     )
 
-    while True:
-        current_iteration_pass += 1
-        if (
-            iterative_search_for_lp_target
-            and current_iteration_pass > max_iterations_passes
-        ):
-            logging.warning(
-                f"Iterative search reached max passes ({max_iterations_passes}). Stopping."
+    # One pooled session and one worker pool for every request in this search
+    with (
+        # One connection per worker, plus one spare for the warm-up request
+        create_http_session(
+            session_headers, pool_maxsize=FETCH_MAX_WORKERS + 1
+        ) as http_session,
+        concurrent.futures.ThreadPoolExecutor(
+            max_workers=FETCH_MAX_WORKERS
+        ) as executor,
+    ):
+        executor.submit(_warm_up_session, http_session)
+
+        # The place for each city doesn't change between passes; resolve all
+        # cities once, concurrently on the shared pool.
+        unique_city_queries = list(dict.fromkeys(city_queries))
+        resolved_places = dict(
+            zip(
+                unique_city_queries,
+                executor.map(
+                    _resolve_place_id,
+                    unique_city_queries,
+                    [session_headers] * len(unique_city_queries),
+                    [http_session] * len(unique_city_queries),
+                ),
             )
-            break
-        if (
-            iterative_search_for_lp_target
-            and current_search_pass_start_date > absolute_max_end_date_for_search
-        ):
-            logging.warning(
-                f"Iterative search reached max search horizon ({absolute_max_end_date_for_search.strftime('%m/%d/%Y')}). Stopping."
-            )
-            break
-
-        hotel_options_this_pass: List[Dict[str, Any]] = []
-        date_range_chunk_for_pass = generate_date_range(
-            current_search_pass_start_date, current_search_pass_end_date
         )
 
-        if not date_range_chunk_for_pass:
+        while True:
+            current_iteration_pass += 1
             if (
-                not iterative_search_for_lp_target
-                or current_search_pass_start_date > current_search_pass_end_date
+                iterative_search_for_lp_target
+                and current_iteration_pass > max_iterations_passes
             ):
-                logging.info("No more valid dates in the current or initial window.")
+                logging.warning(
+                    f"Iterative search reached max passes ({max_iterations_passes}). Stopping."
+                )
+                break
+            if (
+                iterative_search_for_lp_target
+                and current_search_pass_start_date > absolute_max_end_date_for_search
+            ):
+                logging.warning(
+                    f"Iterative search reached max search horizon ({absolute_max_end_date_for_search.strftime('%m/%d/%Y')}). Stopping."
+                )
                 break
 
-        logging.info(
-            f"\n--- Iteration Pass {current_iteration_pass}: Searching Date Window "
-            f"{current_search_pass_start_date.strftime('%m/%d/%Y')} to "
-            f"{current_search_pass_end_date.strftime('%m/%d/%Y')} ---"
-        )
+            hotel_options_this_pass: List[Dict[str, Any]] = []
+            date_range_chunk_for_pass = generate_date_range(
+                current_search_pass_start_date, current_search_pass_end_date
+            )
+
+            if not date_range_chunk_for_pass:
+                if (
+                    not iterative_search_for_lp_target
+                    or current_search_pass_start_date > current_search_pass_end_date
+                ):
+                    logging.info("No more valid dates in the current or initial window.")
+                    break
 
-        for city_idx, current_city_query in enumerate(city_queries):
             logging.info(
-                f"\nProcessing city {city_idx + 1}/{len(city_queries)}: '{current_city_query}' for current date window..."
+                f"\n--- Iteration Pass {current_iteration_pass}: Searching Date Window "
+                f"{current_search_pass_start_date.strftime('%m/%d/%Y')} to "
+                f"{current_search_pass_end_date.strftime('%m/%d/%Y')} ---"
             )
 
-            discovered_locations = discover_place_ids(
-                query=current_city_query, session_headers=session_headers
-            )
-            target_place_id: Optional[str] = None
-            actual_location_name_used_for_city = current_city_query
-
-            if discovered_locations:
-                best_city_match: Optional[Tuple[str, str]] = None
-                for name, place_id_val in discovered_locations:
-                    if "AGODA_CITY" in place_id_val.upper():
-                        if current_city_query.lower() in name.lower():
-                            if best_city_match is None or len(name) < len(
-                                best_city_match[0]
-                            ):
-                                best_city_match = (name, place_id_val)
-                        elif best_city_match is None:
-                            best_city_match = (name, place_id_val)
-
-                if best_city_match:
-                    actual_location_name_used_for_city, target_place_id = (
-                        best_city_match
-                    )
-                    logging.info(
-                        f"Selected place ID for '{actual_location_name_used_for_city}': {target_place_id}"
-                    )
-                elif discovered_locations:
-                    actual_location_name_used_for_city, target_place_id = (
-                        discovered_locations[0]
-                    )
-                    logging.warning(
-                        f"Using first discovered place ID as fallback for '{current_city_query}': {target_place_id} ({actual_location_name_used_for_city})"
-                    )
+            pass_end_date_str = current_search_pass_end_date.strftime("%m/%d/%Y")
+            total_cities = len(city_queries)
+
+            # All cities' dates go into one fan-out on the shared pool, so a
+            # slow city no longer holds up the next one. Their results arrive
+            # interleaved, so progress is reported for the pass as a whole:
+            # dates done out of all dates scheduled across cities.
+            city_progress_list: List[Dict[str, Any]] = []
+            pass_completed_dates = 0
+            search_by_future: Dict[
+                concurrent.futures.Future, Tuple[Dict[str, Any], date]
+            ] = {}
+            results_by_future: Dict[
+                concurrent.futures.Future, Tuple[Dict[str, Any], date]
+            ] = {}
+            scheduled_place_dates: set[Tuple[str, date]] = set()
+
+            for city_idx, current_city_query in enumerate(city_queries):
+                logging.info(
+                    f"\nProcessing city {city_idx + 1}/{total_cities}: '{current_city_query}' for current date window..."
+                )
 
-            if not target_place_id:
-                logging.error(
-                    f"Could not discover a suitable place ID for query '{current_city_query}'. Skipping this city."
+                actual_location_name_used_for_city, target_place_id = (
+                    resolved_places[current_city_query]
                 )
-                if progress_callback:
-                    progress_callback(
-                        0,
-                        0,
-                        current_iteration_pass,
-                        current_search_pass_end_date.strftime("%m/%d/%Y"),
-                        city_idx + 1,
-                        len(city_queries),
-                        current_city_query,
-                        is_final_city_in_pass=(city_idx + 1 == len(city_queries)),
-                        status_message="Place ID not found",
+
+                if not target_place_id:
+                    logging.error(
+                        f"Could not discover a suitable place ID for query '{current_city_query}'. Skipping this city."
                     )
-                continue
+                    if progress_callback:
+                        progress_callback(
+                            0,
+                            0,
+                            current_iteration_pass,
+                            pass_end_date_str,
+                            city_idx + 1,
+                            total_cities,
+                            current_city_query,
+                            status_message="Place ID not found",
+                        )
+                    continue
 
-            if not date_range_chunk_for_pass:
-                logging.warning(
-                    f"No dates to process for {actual_location_name_used_for_city}. Skipping."
-                )
-                if progress_callback:
-                    progress_callback(
-                        0,
-                        0,
-                        current_iteration_pass,
-                        current_search_pass_end_date.strftime("%m/%d/%Y"),
-                        city_idx + 1,
-                        len(city_queries),
-                        current_city_query,
-                        is_final_city_in_pass=(city_idx + 1 == len(city_queries)),
-                        status_message="No dates in range",
+                if not date_range_chunk_for_pass:
+                    logging.warning(
+                        f"No dates to process for {actual_location_name_used_for_city}. Skipping."
                     )
-                continue
+                    if progress_callback:
+                        progress_callback(
+                            0,
+                            0,
+                            current_iteration_pass,
+                            pass_end_date_str,
+                            city_idx + 1,
+                            total_cities,
+                            current_city_query,
+                            status_message="No dates in range",
+                        )
+                    continue
 
-            logging.info(
-                f"Searching Hotels in {actual_location_name_used_for_city} (Place ID: {target_place_id}) for dates {current_search_pass_start_date.strftime('%m/%d/%Y')} to {current_search_pass_end_date.strftime('%m/%d/%Y')}"
-            )
+                logging.info(
+                    f"Searching Hotels in {actual_location_name_used_for_city} (Place ID: {target_place_id}) for dates {current_search_pass_start_date.strftime('%m/%d/%Y')} to {pass_end_date_str}"
+                )
 
-            num_workers = min(10, len(date_range_chunk_for_pass))
-            if num_workers == 0:
-                num_workers = 1
-
-            with concurrent.futures.ThreadPoolExecutor(
-                max_workers=num_workers
-            ) as executor:
-                future_to_date = {
-                    executor.submit(
-                        fetch_data_for_date,
-                        current_date_in_chunk,
-                        actual_location_name_used_for_city,
-                        target_place_id,
-                        session_headers,
-                        aa_card_bonus,
-                        aa_card_miles_rate,  # Pass down
-                        miles_value_rate,  # Pass down
-                    ): current_date_in_chunk
-                    for current_date_in_chunk in date_range_chunk_for_pass
+                city_progress: Dict[str, Any] = {
+                    "city_number": city_idx + 1,
+                    "location_name": actual_location_name_used_for_city,
                 }
+                city_progress_list.append(city_progress)
+
+                # Start every search for the window before polling any results:
+                # the results requests queue behind the initiations, so the
+                # server works on all dates' searches while earlier ones are
+                # being collected. Dates already scheduled for this place
+                # (e.g. two city queries resolving to the same place) aren't
+                # requested again.
+                for current_date_in_chunk in date_range_chunk_for_pass:
+                    place_date = (target_place_id, current_date_in_chunk)
+                    if place_date in scheduled_place_dates:
+                        pass_completed_dates += 1
+                    else:
+                        scheduled_place_dates.add(place_date)
+                        search_future = executor.submit(
+                            start_search_for_date,
+                            current_date_in_chunk,
+                            actual_location_name_used_for_city,
+                            target_place_id,
+                            session_headers,
+                            http_session,
+                        )
+                        search_by_future[search_future] = (
+                            city_progress,
+                            current_date_in_chunk,
+                        )
 
-                completed_dates_for_city = 0
-                total_dates_for_city = len(date_range_chunk_for_pass)
-
-                for future in tqdm(
-                    concurrent.futures.as_completed(future_to_date),
-                    total=total_dates_for_city,
-                    desc=f"Pass {current_iteration_pass}, City {city_idx + 1}/{len(city_queries)} ({actual_location_name_used_for_city})",
-                    file=sys.stderr,
-                    disable=(progress_callback is not None),
-                ):
-                    try:
-                        stays_on_date = future.result()
-                        if stays_on_date:
-                            hotel_options_this_pass.extend(stays_on_date)
-                    except Exception as exc:
-                        logging.error(
-                            f"Error fetching data for a date in {actual_location_name_used_for_city}: {exc}"
+            pending_futures = set(search_by_future)
+            pass_total_dates = len(city_progress_list) * len(date_range_chunk_for_pass)
+            # Report roughly every 5% of the pass's dates, plus once at the end
+            report_every = max(1, pass_total_dates // 20)
+            with tqdm(
+                total=pass_total_dates,
+                initial=pass_completed_dates,
+                desc=f"Pass {current_iteration_pass} ({total_cities} cities)",
+                file=sys.stderr,
+                mininterval=0.5,
+                disable=(progress_callback is not None or not pending_futures),
+            ) as progress_bar:
+                while pending_futures:
+                    done_futures, pending_futures = concurrent.futures.wait(
+                        pending_futures,
+                        return_when=concurrent.futures.FIRST_COMPLETED,
+                    )
+                    for future in done_futures:
+                        is_search_future = future in search_by_future
+                        city_progress, current_date_in_chunk = (
+                            search_by_future[future]
+                            if is_search_future
+                            else results_by_future[future]
                         )
-                    finally:
-                        completed_dates_for_city += 1
-                        if progress_callback:
+                        try:
+                            if is_search_future:
+                                search_uuid = future.result()
+                                if search_uuid:
+                                    results_future = executor.submit(
+                                        fetch_results_for_date,
+                                        search_uuid,
+                                        current_date_in_chunk,
+                                        city_progress["location_name"],
+                                        session_headers,
+                                        aa_card_bonus,
+                                        aa_card_miles_rate,  # Pass down
+                                        miles_value_rate,  # Pass down
+                                        http_session,
+                                    )
+                                    results_by_future[results_future] = (
+                                        city_progress,
+                                        current_date_in_chunk,
+                                    )
+                                    pending_futures.add(results_future)
+                                    continue
+                            else:
+                                stays_on_date = future.result()
+                                if stays_on_date:
+                                    hotel_options_this_pass.extend(stays_on_date)
+                        except Exception as exc:
+                            logging.error(
+                                f"Error fetching data for a date in {city_progress['location_name']}: {exc}"
+                            )
+                        # A date is done once its results are in, or once its
+                        # search could not be started.
+                        pass_completed_dates += 1
+                        progress_bar.update(1)
+                        if (
+                            progress_callback
+                            and pass_completed_dates < pass_total_dates
+                            and pass_completed_dates % report_every == 0
+                        ):
                             progress_callback(
-                                completed_dates_for_city,
-                                total_dates_for_city,
+                                pass_completed_dates,
+                                pass_total_dates,
                                 current_iteration_pass,
-                                current_search_pass_end_date.strftime("%m/%d/%Y"),
-                                city_idx + 1,
-                                len(city_queries),
-                                actual_location_name_used_for_city,
-                                is_final_city_in_pass=(
-                                    city_idx + 1 == len(city_queries)
-                                ),
+                                pass_end_date_str,
+                                city_progress["city_number"],
+                                total_cities,
+                                city_progress["location_name"],
                             )
 
-        if hotel_options_this_pass:
-            existing_hotel_ids_dates = {
-                (h.get("name", ""), h.get("check_in_date", ""))
-                for h in all_hotel_options_global
-            }
-            newly_added_count = 0
-            for h_new in hotel_options_this_pass:
-                hotel_key = (
-                    h_new.get("name", "UnknownHotel"),
-                    h_new.get("location", "UnknownLocation"),
-                    h_new.get("check_in_date", "UnknownDate"),
-                    h_new.get("total_price", 0.0),
+            if progress_callback and city_progress_list:
+                last_city_progress = city_progress_list[-1]
+                progress_callback(
+                    pass_completed_dates,
+                    pass_total_dates,
+                    current_iteration_pass,
+                    pass_end_date_str,
+                    last_city_progress["city_number"],
+                    total_cities,
+                    last_city_progress["location_name"],
+                    is_final_city_in_pass=True,
                 )
-                is_duplicate = False
-                for existing_h in all_hotel_options_global:
-                    existing_key = (
-                        existing_h.get("name", "UnknownHotel"),
-                        existing_h.get("location", "UnknownLocation"),
-                        existing_h.get("check_in_date", "UnknownDate"),
-                        existing_h.get("total_price", 0.0),
+
+            newly_added_count = 0
+            if hotel_options_this_pass:
+                for h_new in hotel_options_this_pass:
+                    hotel_key = _stay_dedup_key(h_new)
+                    if hotel_key not in seen_hotel_keys:
+                        seen_hotel_keys.add(hotel_key)
+                        all_hotel_options_global.append(h_new)
+                        newly_added_count += 1
+                if newly_added_count > 0:
+                    logging.info(
+                        f"Pass {current_iteration_pass}: Added {newly_added_count} new unique hotel options. Total unique options so far: {len(all_hotel_options_global)}"
                     )
-                    if hotel_key == existing_key:
-                        is_duplicate = True
-                        break
-                if not is_duplicate:
-                    all_hotel_options_global.append(h_new)
-                    newly_added_count += 1
-            if newly_added_count > 0:
+                else:
+                    logging.info(
+                        f"Pass {current_iteration_pass}: No new unique hotel options found in this pass. Total unique options: {len(all_hotel_options_global)}"
+                    )
+            else:
                 logging.info(
-                    f"Pass {current_iteration_pass}: Added {newly_added_count} new unique hotel options. Total unique options so far: {len(all_hotel_options_global)}"
+                    f"Pass {current_iteration_pass}: No hotel options found in this date window across all cities searched in this pass."
                 )
-            else:
+
+            # With no new stays the selectors would return the same LP as
+            # last pass, so only re-evaluate when something was added.
+            if newly_added_count > 0:
+                temp_itinerary, temp_cost, temp_total_lp = [], 0.0, current_lp_balance
+                if optimization_strategy == "minimize_cost_for_target_lp":
+                    _, _, temp_total_lp = select_cheapest_stays_for_target_lp(
+                        all_hotel_options_global,
+                        target_loyalty_points,
+                        current_lp_balance,
+                        miles_value_rate,
+                    )
+                elif optimization_strategy == "dp_minimize_cost":
+                    # The DP meets the target iff its candidates can; only the
+                    # final optimization below needs to solve it.
+                    temp_total_lp = _max_lp_one_stay_per_date(
+                        all_hotel_options_global, current_lp_balance
+                    )
+                elif optimization_strategy == "fastest_calendar_time_lp":
+                    _, _, temp_total_lp = select_fastest_calendar_time_lp(
+                        all_hotel_options_global,
+                        target_loyalty_points,
+                        current_lp_balance,
+                        max_overlaps=max_overlaps,  # Pass it here
+                        miles_value_rate=miles_value_rate,
+                    )
+                else:  # Default to points_per_dollar
+                    _, _, temp_total_lp = select_optimal_stays_ppd(
+                        all_hotel_options_global,
+                        target_loyalty_points,
+                        current_lp_balance,
+                        miles_value_rate,
+                    )
+                running_total_lp_achieved = temp_total_lp
+
+            if not iterative_search_for_lp_target:
+                break
+
+            if running_total_lp_achieved >= target_loyalty_points:
                 logging.info(
-                    f"Pass {current_iteration_pass}: No new unique hotel options found in this pass. Total unique options: {len(all_hotel_options_global)}"
+                    f"Target LP of {target_loyalty_points} met or exceeded ({running_total_lp_achieved}). Stopping iterative search."
                 )
-        else:
-            logging.info(
-                f"Pass {current_iteration_pass}: No hotel options found in this date window across all cities searched in this pass."
+                break
+
+            current_search_pass_start_date = current_search_pass_end_date + timedelta(
+                days=1
+            )
+            current_search_pass_end_date = min(
+                current_search_pass_start_date + timedelta(days=29),
+                absolute_max_end_date_for_search,
             )
 
-        if all_hotel_options_global:
-            temp_itinerary, temp_cost, temp_total_lp = [], 0.0, current_lp_balance
-            if optimization_strategy == "minimize_cost_for_target_lp":
-                _, _, temp_total_lp = select_cheapest_stays_for_target_lp(
-                    all_hotel_options_global,
-                    target_loyalty_points,
-                    current_lp_balance,
-                    miles_value_rate,
-                )
-            elif optimization_strategy == "dp_minimize_cost":
-                _, _, temp_total_lp = select_optimal_stays_dp(
-                    all_hotel_options_global,
-                    target_loyalty_points,
-                    current_lp_balance,
-                    miles_value_rate,
-                )
-            elif optimization_strategy == "fastest_calendar_time_lp":
-                _, _, temp_total_lp = select_fastest_calendar_time_lp(
-                    all_hotel_options_global,
-                    target_loyalty_points,
-                    current_lp_balance,
-                    max_overlaps=max_overlaps,  # Pass it here
-                    miles_value_rate=miles_value_rate,
+            if current_search_pass_start_date > current_search_pass_end_date:
+                logging.warning(
+                    "Iterative search: No more valid future dates to search within limits. Stopping."
                 )
-            else:  # Default to points_per_dollar
-                _, _, temp_total_lp = select_optimal_stays_ppd(
-                    all_hotel_options_global,
-                    target_loyalty_points,
-                    current_lp_balance,
-                    miles_value_rate,
+                break
+            if not date_range_chunk_for_pass and not iterative_search_for_lp_target:
+                logging.warning(
+                    "Initial date range was empty and iterative search is not enabled. Stopping."
                 )
-            running_total_lp_achieved = temp_total_lp
-
-        if not iterative_search_for_lp_target:
-            break
+                break
 
-        if running_total_lp_achieved >= target_loyalty_points:
             logging.info(
-                f"Target LP of {target_loyalty_points} met or exceeded ({running_total_lp_achieved}). Stopping iterative search."
-            )
-            break
-
-        current_search_pass_start_date = current_search_pass_end_date + timedelta(
-            days=1
-        )
-        current_search_pass_end_date = min(
-            current_search_pass_start_date + timedelta(days=29),
-            absolute_max_end_date_for_search,
-        )
-
-        if current_search_pass_start_date > current_search_pass_end_date:
-            logging.warning(
-                "Iterative search: No more valid future dates to search within limits. Stopping."
-            )
-            break
-        if not date_range_chunk_for_pass and not iterative_search_for_lp_target:
-            logging.warning(
-                "Initial date range was empty and iterative search is not enabled. Stopping."
+                f"Target LP not yet met ({running_total_lp_achieved}/{target_loyalty_points}). Extending search. Next pass window: {current_search_pass_start_date.strftime('%m/%d/%Y')} to {current_search_pass_end_date.strftime('%m/%d/%Y')}"
             )
-            break
-
-        logging.info(
-            f"Target LP not yet met ({running_total_lp_achieved}/{target_loyalty_points}). Extending search. Next pass window: {current_search_pass_start_date.strftime('%m/%d/%Y')} to {current_search_pass_end_date.strftime('%m/%d/%Y')}"
-        )
 
     if not all_hotel_options_global:
         logging.info("No hotel options found after all search attempts.")
@@ -1298,8 +1646,8 @@ def main():
     final_session_headers: Dict[str, str] = {}
     if args.headers_file:
         try:
-            with open(args.headers_file, "r") as f:
-                final_session_headers = json.load(f)
+            with open(args.headers_file, "rb") as f:
+                final_session_headers = _loads_json(f.read())
             logging.info(f"Using session headers from: {args.headers_file}")
         except FileNotFoundError:
             logging.error(f"Headers file not found: {args.headers_file}.")
@@ -1344,43 +1692,32 @@ def main():
         print_hotel_values_summary(all_hotel_options_main)
 
         if final_itinerary_main:
-            results_logger.info("\n===== Optimal Loyalty Points Strategy =====")
-            results_logger.info(f"Target Loyalty Points: {args.target_lp}")
-            results_logger.info(
-                f"Achieved Loyalty Points (including starting balance): {total_points_earned_main}"
-            )
-            results_logger.info(
-                f"Net New Loyalty Points from Itinerary: {total_points_earned_main - args.current_lp}"
-            )
-            results_logger.info(f"Total Cost: ${total_cost_main:.2f}")
-
             net_new_points = total_points_earned_main - args.current_lp
             if total_cost_main > 0 and net_new_points > 0:
-                results_logger.info(
-                    f"Overall Points per Dollar (for new points): {net_new_points / total_cost_main:.2f}"
-                )
+                overall_ppd_display = f"{net_new_points / total_cost_main:.2f}"
             else:
-                results_logger.info("Overall Points per Dollar (for new points): N/A")
-
-            results_logger.info("\nItinerary Details:")
+                overall_ppd_display = "N/A"
             header = f"{'Hotel Name':<35} {'Loc':<15} {'Date':<10} {'Price':<8} {'LP':<8} {'LP PPD':<7} {'Miles':<8} {'Val($)':<7}"
-            results_logger.info(header)
-            results_logger.info("=" * len(header))
-            for stay in final_itinerary_main:
-                stay_net_lp = stay.get(
-                    "points_earned_final_for_itinerary", stay.get("points_earned", 0)
-                )
-                stay_final_lp_ppd = stay.get(
-                    "points_per_dollar_final_for_itinerary",
-                    stay.get("points_per_dollar", 0.0),
-                )
-                stay_miles = stay.get("miles_earned", 0)
-                stay_miles_value = stay.get("miles_value", 0.0)
-                results_logger.info(
-                    f"{stay['name']:<35.35} {stay['location']:<15.15} {stay['check_in_date']:<10} "
-                    f"${stay['total_price']:<7.2f} {stay_net_lp:<8} "
-                    f"{stay_final_lp_ppd:<7.2f} {stay_miles:<8} ${stay_miles_value:<6.2f}"
-                )
+            report_lines = [
+                "\n===== Optimal Loyalty Points Strategy =====",
+                f"Target Loyalty Points: {args.target_lp}",
+                f"Achieved Loyalty Points (including starting balance): {total_points_earned_main}",
+                f"Net New Loyalty Points from Itinerary: {net_new_points}",
+                f"Total Cost: ${total_cost_main:.2f}",
+                f"Overall Points per Dollar (for new points): {overall_ppd_display}",
+                "\nItinerary Details:",
+                header,
+                "=" * len(header),
+            ]
+            # Itinerary stays always carry the status-adjusted fields
+            report_lines.extend(
+                f"{stay['name']:<35.35} {stay['location']:<15.15} {stay['check_in_date']:<10} "
+                f"${stay['total_price']:<7.2f} {stay['points_earned_final_for_itinerary']:<8} "
+                f"{stay['points_per_dollar_final_for_itinerary']:<7.2f} "
+                f"{stay['miles_earned']:<8} ${stay['miles_value']:<6.2f}"
+                for stay in final_itinerary_main
+            )
+            results_logger.info("\n".join(report_lines))
         else:
             results_logger.info(
                 f"Could not form an itinerary to meet target {args.target_lp} points."
@@ -1,35 +1,34 @@
+import hashlib
+import importlib.util
 import json
 import os  # Add os import
+import queue
+import re
 import sys  # Add sys import
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
 try:
-    import altair as alt
+    import orjson
 
-    altair_available = True
+    _loads_json = orjson.loads
 except ImportError:
-    altair_available = False
-    alt = None  # Ensure alt is defined even if import fails
-    # This warning will appear in the sidebar if altair is not installed.
-    # Consider moving this st.sidebar.warning to a place where sidebar is already defined,
-    # or ensure it's called only when the main app flow starts.
-    # For now, placing it here and it will be displayed if altair is missing when script runs.
-    # A better place might be right after st.sidebar.header if Streamlit initializes sidebar early.
-    # However, to avoid conditional execution complexities, we'll show it if altair is missing.
-    # This might result in a warning appearing before the sidebar is fully rendered by user's code.
-    # A simple print to console or logging might be less intrusive if direct st call is problematic here.
-    # For now, let's assume st.sidebar.warning can be called here.
-    # If not, this should be moved into the main app body or a setup function.
-    # Let's try to display it later, when we are sure sidebar exists.
-
-# Add the project root to sys.path to ensure aa_hotel_optimizer is discoverable
+    _loads_json = json.loads
+
 # This assumes streamlit_app.py is in the project root.
 current_dir = os.path.dirname(os.path.abspath(__file__))
-if current_dir not in sys.path:
+# `streamlit run` already puts the script's directory on sys.path; only add the
+# project root when aa_hotel_optimizer can't be found (e.g. loaded some other way).
+if importlib.util.find_spec("aa_hotel_optimizer") is None:
     sys.path.insert(0, current_dir)
 
 # Page config must be the first Streamlit command
@@ -50,7 +49,7 @@ if "auth_method_key" not in st.session_state:
 
 
 # Initialize to None or default values before try-except
-PREDEFINED_CITY_LISTS: Dict[str, list[str]] = {}
+PREDEFINED_CITY_LISTS: Mapping[str, Sequence[str]] = {}
 parse_curl_command: Optional[Callable[[str], Tuple[Optional[str], Dict[str, str]]]] = (
     None
 )
@@ -72,8 +71,10 @@ try:
     PREDEFINED_CITY_LISTS = imported_lists
     find_best_hotel_deals = imported_find_deals
     parse_curl_command = imported_parse_curl
+    _imports_ok = True
 
 except ImportError as e:
+    _imports_ok = False
     st.error(
         f"Failed to import necessary modules: {e}. Ensure 'aa_hotel_optimizer' is correctly structured and all dependencies are installed. "
         "If running from the project root, this should work if the package structure is correct."
@@ -90,26 +91,519 @@ except ImportError as e:
         )
     # If PREDEFINED_CITY_LISTS is still its initial empty value after an import error,
     # it means it wasn't successfully imported from aa_hotel_optimizer.locations.
-    # We check 'imported_lists' not in locals() to be sure we are in the except block due to its import failing.
-    if not PREDEFINED_CITY_LISTS and "imported_lists" not in locals():
+    if not _imports_ok and not PREDEFINED_CITY_LISTS:
         PREDEFINED_CITY_LISTS = {"Error": ["Could not load city lists"]}  # Fallback
         st.warning("Predefined city lists are not available.")
 
 
+# Region names and their city tuples, fixed once the city lists are loaded
+REGION_NAMES = tuple(PREDEFINED_CITY_LISTS.keys())
+REGION_TO_CITIES = {
+    region: tuple(cities) for region, cities in PREDEFINED_CITY_LISTS.items()
+}
+
 # Default target points, can be overridden by user input
 DEFAULT_TARGET_POINTS = 200000
 
-# Display Altair warning in sidebar if it's not available
-if not altair_available:
-    st.sidebar.warning(
-        "Altair library not found. Some charts may use fallbacks. Install with: pip install altair"
+# Splits the custom cities box and trims whitespace around each name in one pass
+CITY_SEPARATOR_RE = re.compile(r"\s*,\s*")
+
+# Progress frames are capped at ~20 Hz; each one is a frontend round trip
+PROGRESS_MIN_INTERVAL_SECONDS = 0.05
+
+OPTIMIZATION_STRATEGY_OPTIONS = {
+    "Maximize Points per Dollar (Greedy PPD)": "points_per_dollar",
+    "Minimize Cost for Target LP (Greedy Cheapest Stays)": "minimize_cost_for_target_lp",
+    "Minimize Cost for Target LP (Dynamic Programming)": "dp_minimize_cost",
+    "Fastest Calendar Time to Target LP (Overlaps OK)": "fastest_calendar_time_lp",
+}
+OPTIMIZATION_STRATEGY_LABELS = tuple(OPTIMIZATION_STRATEGY_OPTIONS.keys())
+
+ITINERARY_DISPLAY_COLUMNS = (
+    "name",
+    "location",
+    "check_in_date",
+    "total_price",
+    "api_points_earned",
+    "card_bonus_points",
+    "status_bonus_points",
+    "points_earned_final_for_itinerary",
+    "points_per_dollar_final_for_itinerary",
+    "miles_earned",
+    "miles_value",
+)
+ITINERARY_COLUMN_CONFIG = {
+    "name": st.column_config.TextColumn("Hotel Name", width="large"),
+    "location": "Location",
+    "check_in_date": "Check-in",
+    "total_price": st.column_config.NumberColumn("Price", format="$%.2f"),
+    "api_points_earned": st.column_config.NumberColumn(
+        "API Points",
+        format="%d",
+        help="Base points from the hotel booking.",
+    ),
+    "card_bonus_points": st.column_config.NumberColumn(
+        "Card Bonus",
+        format="%d",
+        help="Points from AA credit card (10 miles/$).",
+    ),
+    "status_bonus_points": st.column_config.NumberColumn(
+        "Status Bonus",
+        format="%d",
+        help="Points from AAdvantage status bonus.",
+    ),
+    "points_earned_final_for_itinerary": st.column_config.NumberColumn(
+        "Total Stay LP",
+        format="%d",
+        help="Total Loyalty Points for this stay (API + Card + Status).",
+    ),
+    "points_per_dollar_final_for_itinerary": st.column_config.NumberColumn(
+        "Stay LP PPD",
+        format="%.2f",
+        help="Total Loyalty Points / Price for this stay.",
+    ),
+    "miles_earned": st.column_config.NumberColumn(
+        "Miles Earned",
+        format="%d",
+        help="Total miles earned for this stay (LPs + spend miles if card used).",
+    ),
+    "miles_value": st.column_config.NumberColumn(
+        "Miles Value ($)",
+        format="$%.2f",
+        help="Value of miles earned for this stay (at $0.015/mile).",
+    ),
+}
+
+
+@st.cache_resource
+def _itinerary_column_config(columns: Tuple[str, ...]) -> Dict[str, Any]:
+    """ITINERARY_COLUMN_CONFIG restricted to the given columns, built once per set."""
+    present = frozenset(columns)
+    return {k: v for k, v in ITINERARY_COLUMN_CONFIG.items() if k in present}
+
+
+ALL_OPTIONS_DISPLAY_COLUMNS = (
+    "name",
+    "location",
+    "check_in_date",
+    "total_price",
+    "api_points_earned",
+    "card_bonus_points",
+    "points_earned",
+    "points_per_dollar",
+    "miles_earned",
+    "miles_value",
+    "refundability",
+    "star_rating",
+    "user_rating",
+)
+ALL_OPTIONS_COLUMN_CONFIG = {
+    "name": st.column_config.TextColumn("Hotel Name", width="large"),
+    "location": "Location",
+    "check_in_date": "Check-in",
+    "total_price": st.column_config.NumberColumn("Price", format="$%.2f"),
+    "api_points_earned": st.column_config.NumberColumn(
+        "API Points",
+        format="%d",
+        help="Base points from the hotel booking.",
+    ),
+    "card_bonus_points": st.column_config.NumberColumn(
+        "Card Bonus",
+        format="%d",
+        help="Points from AA credit card (10 miles/$).",
+    ),
+    "points_earned": st.column_config.NumberColumn(
+        "Base+Card LP",
+        format="%d",
+        help="API Points + Card Bonus. Status bonus is applied during itinerary selection.",
+    ),
+    "points_per_dollar": st.column_config.NumberColumn(
+        "Base+Card LP PPD",
+        format="%.2f",
+        help="PPD based on API Points + Card Bonus (LPs only).",
+    ),
+    "miles_earned": st.column_config.NumberColumn(
+        "Miles Earned (Stay)",
+        format="%d",
+        help="Total miles for this stay (LPs + spend miles if card used), reflects final calculation.",
+    ),
+    "miles_value": st.column_config.NumberColumn(
+        "Miles Value (Stay, $)",
+        format="$%.2f",
+        help="Value of miles for this stay (at $0.015/mile), reflects final calculation.",
+    ),
+    "refundability": "Refundable",
+    "star_rating_display": st.column_config.TextColumn("Stars"),
+    "user_rating": st.column_config.NumberColumn("Rating", format="%.1f"),
+}
+
+ALL_OPTIONS_PAGE_SIZE = 100
+# Bins per distribution chart, for both the Altair and st.bar_chart versions
+HISTOGRAM_BINS = 20
+# Width (px) of each Altair histogram; three side by side fill the wide layout
+HISTOGRAM_CHART_WIDTH = 380
+HISTOGRAM_COLUMNS = ("total_price", "user_rating", "star_rating")
+REFUNDABILITY_LABELS = {
+    "REFUNDABLE": "✅ Refundable",
+    "NON_REFUNDABLE": "❌ Non-Refundable",
+}
+REFUNDABILITY_UNKNOWN_LABEL = "❓ Unknown"
+
+# Identical searches are answered from memory instead of re-scanning the hotel API
+SEARCH_CACHE_TTL_SECONDS = 3600
+SEARCH_CACHE_MAX_ENTRIES = 64
+
+
+@st.cache_resource
+def _search_results_store() -> Tuple[
+    threading.Lock, "OrderedDict[str, Tuple[float, Any]]"
+]:
+    # st.cache_data would replay the progress bar writes made during the search,
+    # which live in placeholders created outside the cached function. Keep a
+    # process-wide store instead so the backend still reports live progress.
+    return threading.Lock(), OrderedDict()
+
+
+def _search_cache_key(search_params: Dict[str, Any], headers: Dict[str, str]) -> str:
+    """Stable digest of the search parameters; raw header values are never stored."""
+    payload = json.dumps(
+        {"params": search_params, "headers": headers}, sort_keys=True, default=str
     )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _new_result_id() -> str:
+    """Identifies one set of search results; the DataFrame caches key on it."""
+    return uuid.uuid4().hex
+
+
+def _get_cached_search_results(search_key: str) -> Optional[Tuple[str, Any]]:
+    """(result ID, results) stored for search_key, or None if absent or expired."""
+    lock, entries = _search_results_store()
+    with lock:
+        entry = entries.get(search_key)
+        if entry is None:
+            return None
+        stored_at, result_id, results = entry
+        if time.monotonic() - stored_at > SEARCH_CACHE_TTL_SECONDS:
+            del entries[search_key]
+            return None
+        entries.move_to_end(search_key)
+        return result_id, results
+
+
+def _store_search_results(search_key: str, result_id: str, results: Any) -> None:
+    lock, entries = _search_results_store()
+    with lock:
+        entries[search_key] = (time.monotonic(), result_id, results)
+        entries.move_to_end(search_key)
+        while len(entries) > SEARCH_CACHE_MAX_ENTRIES:
+            entries.popitem(last=False)
+
+
+# Opt-in: uploaded header files can be saved under a profile name the user
+# chooses, so they survive app restarts. Every browser session runs as the
+# same OS user, so a profile is only ever read when its name is typed in.
+HEADER_PROFILES_DIR = os.path.join(
+    os.path.expanduser("~"), ".aa_hotel_optimizer", "header_profiles"
+)
 
-st.title("AAdvantage Hotel Optimizer")
 
-with st.expander("How to Use This App & Important Notes", expanded=False):
-    st.markdown(
-        """
+def _header_profile_path(profile: str) -> Optional[str]:
+    safe_name = re.sub(r"[^\w.-]", "_", profile.strip())
+    if not safe_name.strip("."):
+        return None
+    return os.path.join(HEADER_PROFILES_DIR, f"{safe_name}.json")
+
+
+def _save_header_profile(profile: str, headers: Dict[str, str]) -> None:
+    profile_path = _header_profile_path(profile)
+    if profile_path is None:
+        return
+    os.makedirs(HEADER_PROFILES_DIR, exist_ok=True)
+    # Headers carry session cookies; keep the file private to the user
+    fd = os.open(profile_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump(headers, f)
+
+
+def _load_header_profile(profile: str) -> Dict[str, str]:
+    profile_path = _header_profile_path(profile)
+    if profile_path is None:
+        return {}
+    try:
+        with open(profile_path, "rb") as f:
+            return _loads_json(f.read())
+    except (OSError, ValueError):
+        return {}
+
+
+def _delete_header_profile(profile: str) -> None:
+    profile_path = _header_profile_path(profile)
+    if profile_path is None:
+        return
+    try:
+        os.remove(profile_path)
+    except OSError:
+        pass
+
+
+# Searches run off the script thread, one at a time per browser session; the
+# script polls for progress meanwhile
+SEARCH_POLL_INTERVAL_SECONDS = 0.1
+
+
+class _SearchCancelled(Exception):
+    """Raised inside an abandoned search at its next progress report."""
+
+
+def _session_search_executor() -> ThreadPoolExecutor:
+    """This browser session's single-worker search pool, kept in session state."""
+    executor = st.session_state.get("search_executor")
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hotel-search")
+        st.session_state.search_executor = executor
+    return executor
+
+
+def _start_search(
+    search_key: str,
+    search_params: Dict[str, Any],
+    session_headers: Dict[str, str],
+    status_message: str,
+) -> Dict[str, Any]:
+    """Submits a search for this session and returns its pending-search entry."""
+    # The backend runs in a worker thread and must not touch Streamlit
+    # elements; it queues its progress reports for the script thread.
+    progress_events: "queue.Queue[Tuple[tuple, dict]]" = queue.Queue()
+    cancel_requested = threading.Event()
+    result_id = _new_result_id()
+
+    def queue_progress_callback(*args, **kwargs):
+        if cancel_requested.is_set():
+            raise _SearchCancelled()
+        progress_events.put((args, kwargs))
+
+    def store_finished_results(future) -> None:
+        # Runs even if no script run is polling the search any more, so
+        # finished work still reaches the results cache.
+        if future.cancelled() or future.exception() is not None:
+            return
+        search_results = future.result()
+        # The backend reports request errors (429s, expired cookies,
+        # timeouts) as empty results; don't replay those from cache.
+        if search_results[0]:
+            _store_search_results(search_key, result_id, search_results)
+
+    search_future = _session_search_executor().submit(
+        find_best_hotel_deals,
+        session_headers=session_headers,
+        progress_callback=queue_progress_callback,
+        **search_params,
+    )
+    search_future.add_done_callback(store_finished_results)
+    return {
+        "key": search_key,
+        "result_id": result_id,
+        "params": search_params,
+        "future": search_future,
+        "progress_events": progress_events,
+        "cancel_requested": cancel_requested,
+        "status_message": status_message,
+    }
+
+
+def _cancel_search(pending_search: Dict[str, Any]) -> None:
+    """Stops a pending search: dropped if still queued, else at its next report."""
+    pending_search["cancel_requested"].set()
+    pending_search["future"].cancel()
+
+
+def _await_search(
+    pending_search: Dict[str, Any],
+    progress_bar_placeholder: Any,
+    status_text_placeholder: Any,
+) -> Any:
+    """Renders a pending search's progress until it finishes; returns its results."""
+    iterative_search = pending_search["params"]["iterative_search_for_lp_target"]
+    # Timestamp of the last progress frame sent to the frontend
+    last_progress_frame = {"ts": 0.0}
+
+    def streamlit_progress_callback(
+        completed_dates_in_pass: int,
+        total_dates_in_pass: int,
+        current_pass: Optional[int] = None,
+        pass_end_date: Optional[str] = None,
+        current_city_idx: Optional[int] = None,
+        total_cities: Optional[int] = None,
+        current_city_name: Optional[str] = None,
+        is_final_city_in_pass: bool = False,
+        status_message: Optional[str] = None,
+    ):
+        # Progress covers every city's dates in the pass. Coalesce per-date
+        # bursts, but always emit status changes and the pass's final
+        # frame. Nothing is formatted for dropped frames.
+        now = time.monotonic()
+        if not (
+            status_message
+            or is_final_city_in_pass
+            or now - last_progress_frame["ts"] >= PROGRESS_MIN_INTERVAL_SECONDS
+        ):
+            return
+        last_progress_frame["ts"] = now
+        progress = 0.0
+        if total_dates_in_pass > 0:
+            progress = completed_dates_in_pass / total_dates_in_pass
+        progress_bar_placeholder.progress(progress)
+        msg_parts = []
+        if current_pass is not None:
+            msg_parts.append(f"Pass {current_pass}")
+        if (
+            total_cities
+            and total_cities > 1
+            and current_city_idx is not None
+            and current_city_name
+        ):
+            # Cities are searched together; name the one that just reported
+            msg_parts.append(
+                f"{total_cities} cities (latest: City {current_city_idx} '{current_city_name}')"
+            )
+        if total_dates_in_pass > 0:
+            msg_parts.append(
+                f"Processed {completed_dates_in_pass}/{total_dates_in_pass} city-dates"
+            )
+        if pass_end_date:
+            msg_parts.append(f"(window up to {pass_end_date})")
+        if status_message:
+            msg_parts.append(f"- {status_message}")
+        elif iterative_search and is_final_city_in_pass:
+            msg_parts.append("Pass complete.")
+        elif iterative_search:
+            msg_parts.append("Searching...")
+        status_text_placeholder.text(" | ".join(msg_parts))
+
+    progress_bar_placeholder.progress(0)
+    status_text_placeholder.text(pending_search["status_message"])
+    search_future = pending_search["future"]
+    progress_events = pending_search["progress_events"]
+    while True:
+        # Check before draining so the final reports are rendered too
+        search_done = search_future.done()
+        while True:
+            try:
+                args, kwargs = progress_events.get_nowait()
+            except queue.Empty:
+                break
+            streamlit_progress_callback(*args, **kwargs)
+        if search_done:
+            break
+        time.sleep(SEARCH_POLL_INTERVAL_SECONDS)
+    return search_future.result()
+
+
+def _last_search_entry(
+    search_key: str, result_id: str, search_results: Any, search_params: Dict[str, Any]
+) -> Dict[str, Any]:
+    return {
+        "key": search_key,
+        "result_id": result_id,
+        "results": search_results,
+        "target_loyalty_points": search_params["target_loyalty_points"],
+        "current_lp_balance": search_params["current_lp_balance"],
+    }
+
+
+@st.cache_data(
+    show_spinner=False,
+    ttl=SEARCH_CACHE_TTL_SECONDS,
+    max_entries=SEARCH_CACHE_MAX_ENTRIES,
+)
+def _itinerary_frame(
+    result_id: str, _final_itinerary: List[Dict[str, Any]]
+) -> pd.DataFrame:
+    """Itinerary DataFrame for one set of search results (see _new_result_id)."""
+    return pd.DataFrame(_final_itinerary)
+
+
+def _as_numeric(values: pd.Series) -> pd.Series:
+    """values as numbers; only object/string columns go through pd.to_numeric."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values
+    return pd.to_numeric(values, errors="coerce")
+
+
+@st.cache_data(
+    show_spinner=False,
+    ttl=SEARCH_CACHE_TTL_SECONDS,
+    max_entries=SEARCH_CACHE_MAX_ENTRIES,
+)
+def _all_options_frame(
+    result_id: str, _all_hotel_options: List[Dict[str, Any]]
+) -> Tuple[pd.DataFrame, List[str]]:
+    """Display-ready "All Hotel Options" frame, sorted by PPD, and its column order."""
+    # Only the displayed fields are materialized; the records carry many more.
+    # Gathering them column by column lets pandas wrap each list directly
+    # instead of walking every record's keys.
+    display_cols_all = list(ALL_OPTIONS_DISPLAY_COLUMNS)
+    df_all_options_display = pd.DataFrame(
+        {
+            col: [option.get(col) for option in _all_hotel_options]
+            for col in display_cols_all
+        },
+        columns=display_cols_all,
+    )
+    if "refundability" in df_all_options_display.columns:
+        df_all_options_display.loc[:, "refundability"] = (
+            df_all_options_display["refundability"]
+            .map(REFUNDABILITY_LABELS)
+            .fillna(REFUNDABILITY_UNKNOWN_LABEL)
+        )
+    if "star_rating" in df_all_options_display.columns:
+        star_ratings = _as_numeric(df_all_options_display["star_rating"])
+        has_star_rating = star_ratings > 0
+        df_all_options_display.loc[:, "star_rating_display"] = (
+            star_ratings[has_star_rating]
+            .map("{:.1f} ⭐".format)
+            .reindex(star_ratings.index, fill_value="N/A")
+        )
+        display_cols_all = [
+            col if col != "star_rating" else "star_rating_display"
+            for col in display_cols_all
+        ]
+    if "points_per_dollar" in df_all_options_display.columns and (
+        pd.api.types.is_numeric_dtype(df_all_options_display["points_per_dollar"])
+    ):
+        # Runs once per search; paging slices the sorted frame. Stable, so
+        # equal-PPD options keep the backend's order.
+        df_all_options_display = df_all_options_display.sort_values(
+            "points_per_dollar", ascending=False, kind="mergesort"
+        )
+    return df_all_options_display, display_cols_all
+
+
+@st.cache_data(
+    show_spinner=False,
+    ttl=SEARCH_CACHE_TTL_SECONDS,
+    max_entries=SEARCH_CACHE_MAX_ENTRIES,
+)
+def _all_options_histograms(
+    result_id: str, _df_all_options_display: pd.DataFrame
+) -> Dict[str, pd.DataFrame]:
+    """Binned data for each distribution chart, computed once per result set."""
+    return {
+        col: _histogram_frame(_df_all_options_display[col])
+        for col in HISTOGRAM_COLUMNS
+        if col in _df_all_options_display.columns
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _parse_curl_cached(curl_command: str) -> Tuple[Optional[str], Dict[str, str]]:
+    """Memoized cURL parsing; the same pasted command is only parsed once."""
+    return parse_curl_command(curl_command)
+
+
+HELP_INSTRUCTIONS_MD = """
         ### Instructions for Obtaining cURL Command from AA Hotels Website:
 
         To use the "cURL Command" authentication method, you'll need to copy a network request from your browser after performing a hotel search on the [American Airlines Hotels website](https://www.aadvantagehotels.com/).
@@ -121,17 +615,8 @@ with st.expander("How to Use This App & Important Notes", expanded=False):
         3.  **Find the Search Request:** In the "Network" tab of your developer tools, you'll see a list of requests. Look for a request that starts with `searchRequest?...` or similar, which corresponds to the hotel search API call. It will likely be an `XHR` (XMLHttpRequest) or `fetch` type request.
         You can filter the requests by typing "search" or "searchRequest" into the filter box in the Network tab to help locate it.
         """
-    )
-    st.image(
-        os.path.join(current_dir, "assets", "curl1.png"),
-        caption="Example: Finding the searchRequest in browser developer tools.",
-    )
-    st.image(
-        os.path.join(current_dir, "assets", "curl.png"),
-        caption="Example: Finding the searchRequest in browser developer tools.",
-    )
-    st.markdown(
-        """
+
+HELP_COPY_AND_WARNINGS_MD = """
         4.  **Copy as cURL:**
             *   **Chrome/Edge:** Right-click on the `searchRequest` (or equivalent) network call. Navigate to `Copy` > `Copy as cURL (bash)` or `Copy as cURL (cmd)` if on Windows.
             *   **Firefox:** Right-click on the request. Navigate to `Copy Value` > `Copy as cURL`.
@@ -144,9 +629,88 @@ with st.expander("How to Use This App & Important Notes", expanded=False):
         *   **Uncertainty of Consequences:** The consequences of such flagging are unknown and could range from temporary IP blocks to account-related actions. Use this tool at your own discretion and avoid overly frequent or very broad searches if concerned.
         *   **No Guarantees:** This tool is provided as-is, without any guarantees regarding its continued functionality or any liabilities arising from its use.
         """
+
+HELP_IMAGE_CAPTION = "Example: Finding the searchRequest in browser developer tools."
+
+
+# Probing the module spec is cheap; altair itself is imported on first chart render
+ALTAIR_AVAILABLE = importlib.util.find_spec("altair") is not None
+
+
+def _get_altair():
+    """Import altair on first chart render; returns None if it isn't installed."""
+    if not ALTAIR_AVAILABLE:
+        return None
+    try:
+        import altair as alt
+    except ImportError:
+        return None
+    return alt
+
+
+def _histogram_frame(values: pd.Series, bins: int = HISTOGRAM_BINS) -> pd.DataFrame:
+    """Equal-width bin edges and counts; charts only ever receive these rows."""
+    numeric_values = _as_numeric(values).dropna().to_numpy()
+    if numeric_values.size == 0:
+        return pd.DataFrame(columns=["bin_start", "bin_end", "count"])
+    counts, edges = np.histogram(numeric_values, bins=bins)
+    return pd.DataFrame(
+        {"bin_start": edges[:-1], "bin_end": edges[1:], "count": counts}
     )
 
 
+def _histogram_counts(hist: pd.DataFrame) -> pd.Series:
+    """_histogram_frame counts indexed by bin midpoint, for st.bar_chart."""
+    midpoints = ((hist["bin_start"] + hist["bin_end"]) / 2).round(2)
+    return pd.Series(hist["count"].to_numpy(), index=midpoints.to_numpy())
+
+
+def style_ppd_column(df, column_name="points_per_dollar", vmin=None, vmax=None):
+    """Shade a points-per-dollar column green; returns df unchanged if it can't.
+
+    Pass vmin/vmax from the full column when df is one page of a larger table,
+    so the same PPD gets the same shade on every page.
+    """
+    if (
+        column_name in df.columns
+        and pd.api.types.is_numeric_dtype(df[column_name])
+        and not df[column_name].empty
+    ):
+        if df[column_name].count() > 0:
+            return df.style.background_gradient(
+                subset=[column_name],
+                cmap="Greens",
+                low=0.1,
+                high=1.0,
+                vmin=vmin,
+                vmax=vmax,
+            )
+    return df
+
+
+@st.cache_resource
+def _load_asset_bytes(filename: str) -> bytes:
+    """Read an image from assets/ once per process instead of on every rerun."""
+    with open(os.path.join(current_dir, "assets", filename), "rb") as f:
+        return f.read()
+
+
+# Display Altair warning in sidebar if it's not available
+if not ALTAIR_AVAILABLE:
+    st.sidebar.warning(
+        "Altair library not found. Some charts may use fallbacks. Install with: pip install altair"
+    )
+
+st.title("AAdvantage Hotel Optimizer")
+
+with st.expander("How to Use This App & Important Notes", expanded=False):
+    st.markdown(HELP_INSTRUCTIONS_MD)
+    help_image_col1, help_image_col2 = st.columns(2)
+    help_image_col1.image(_load_asset_bytes("curl1.png"), caption=HELP_IMAGE_CAPTION)
+    help_image_col2.image(_load_asset_bytes("curl.png"), caption=HELP_IMAGE_CAPTION)
+    st.markdown(HELP_COPY_AND_WARNINGS_MD)
+
+
 st.sidebar.header("Search Parameters")
 
 # --- Search Type Selection ---
@@ -157,17 +721,277 @@ search_type = st.sidebar.radio(
     help="Choose 'Specific Location(s)' to search one or more particular cities. Choose 'Broad Points Optimization' to scan predefined regions or many custom cities for general point earning.",
 )
 
-# --- Conditional City/Region Inputs ---
+# --- Authentication Method ---
+# Outside the form because it decides which credential inputs are shown.
+st.sidebar.subheader("Authentication Details")
+st.sidebar.caption(
+    "Note: Authenticated requests (e.g., via cURL or headers file) are recommended to see personalized bonus levels, "
+    "promotional offers, and accurate mileage earnings based on your AAdvantage status or specific card benefits."
+)
+
+# Store the auth method from *before* the radio button potentially changes it in this run
+# This helps detect if the user switched away from "JSON File" method
+previous_auth_method_for_json_handling = st.session_state.auth_method_key
+
+# Render the radio button. Its state is now updated in st.session_state.auth_method_key
+st.sidebar.radio(
+    "Authentication Method",
+    ("cURL Command", "Manual Cookie/XSRF", "JSON File"),
+    index=0,  # Default to "cURL Command" if key not in session_state or is None
+    help="Choose how to provide authentication details. cURL is often easiest if you can copy it from your browser's developer tools.",
+    key="auth_method_key",
+)
+# current_auth_method is the source of truth for the selected auth method
+current_auth_method = st.session_state.auth_method_key
+
+# If auth method was "JSON File" and has now changed to something else, clear the stored JSON headers
+if (
+    previous_auth_method_for_json_handling == "JSON File"
+    and current_auth_method != "JSON File"
+):
+    st.session_state.session_headers_from_file = {}
+    # st.sidebar.caption("Cleared previously uploaded JSON headers due to method change.") # Optional user feedback
+
+# --- Search Form ---
+# Every search input is batched in a form so editing it does not rerun the
+# script; only the submit button does. The search type and authentication
+# method stay outside because they decide which inputs the form shows.
+with st.sidebar.form("search_form"):
+    # --- Conditional City/Region Inputs ---
+    specific_city_input = ""
+    selected_region_names: List[str] = []
+    custom_cities_input = ""
+    if search_type == "Specific Location(s)":
+        specific_city_input = st.text_input(
+            "City to Search:",
+            "Las Vegas",
+            help="Enter the city you want to search.",
+            key="specific_city_input",
+        )
+    elif search_type == "Broad Points Optimization":
+        selected_region_names = st.multiselect(
+            "Select Regions/City Lists:",
+            options=REGION_NAMES,
+            help="Select one or more predefined lists of cities to search.",
+            key="selected_region_names",
+        )
+        custom_cities_input = st.text_area(
+            "Or, add custom cities (comma-separated):",
+            help="Enter additional city names, separated by commas.",
+            key="custom_cities_input",
+        )
+
+    # --- Common Search Parameters ---
+    default_start_date = date.today()
+    default_end_date = default_start_date + timedelta(days=1)
+
+    start_date_input = st.date_input(
+        "Start Date", default_start_date, key="start_date_picker"
+    )
+    end_date_input = st.date_input("End Date", default_end_date, key="end_date_picker")
+
+    aa_card_bonus_checkbox = st.checkbox(
+        "AA Credit Card Bonus (10 miles/$)",
+        value=True,
+        help="Select if you are using an AAdvantage credit card for an extra 10 miles per dollar spent.",
+        key="aa_card_bonus_checkbox",
+    )
+    # Widgets inside a form cannot react to each other before submit, so the
+    # rate selector is always shown and ignored when the card bonus is off.
+    aa_card_miles_rate_selection = st.radio(
+        "AA Card Miles Rate on Spend:",
+        options=[1, 10],
+        index=0,  # Default to 1x
+        format_func=lambda x: f"{x}x miles per dollar",
+        key="aa_card_miles_rate_selector",
+        help="Select the miles earning rate on card spend (1x or 10x). Effective only if AA Card Bonus is checked.",
+    )
+
+    current_lp_balance_input = st.number_input(
+        "Current Loyalty Points Balance",
+        min_value=0,
+        value=0,
+        step=100,
+        help="Enter your current AAdvantage Loyalty Points balance to factor in status bonuses.",
+        key="current_lp_balance_input",
+    )
+
+    st.markdown("---")
+    st.subheader("Optimization Strategy")
+    st.radio(
+        "Choose Optimization Method:",
+        options=OPTIMIZATION_STRATEGY_LABELS,
+        index=0,  # Default to PPD
+        help=(
+            "Maximize PPD: Good for general high-value stays.\n"
+            "Minimize Cost (Greedy): Finds the cheapest stays to hit LP target quickly.\n"
+            "Minimize Cost (DP): More thorough, aims for true minimum cost to hit LP target (can be slower).\n"
+            "Fastest Calendar Time to Target LP: Aims to complete the LP target by the earliest possible calendar date, allowing stays to overlap."
+        ),
+        key="selected_strategy_display_key",
+    )
+    # Always shown for the same reason as the card rate; only the 'Fastest
+    # Calendar Time' strategy uses it.
+    st.number_input(
+        "Max Concurrent Overlaps:",
+        min_value=1,
+        max_value=20,  # Arbitrary upper limit, can be adjusted
+        value=5,
+        step=1,
+        key="max_concurrent_overlaps_input",
+        help="Set the maximum number of hotel stays that can overlap on any given day. Effective only for the 'Fastest Calendar Time' strategy.",
+    )
+
+    st.markdown("---")
+    st.subheader("Search Mode")
+    st.number_input(
+        "Target Loyalty Points",
+        min_value=0,
+        value=DEFAULT_TARGET_POINTS,
+        step=1000,
+        key="target_loyalty_points_input",
+    )
+    st.checkbox(
+        "Search future dates until LP target is met",
+        value=False,
+        help="If checked, the search will extend into future dates (up to ~6 months or as configured) until the LP target is met.",
+        key="iterative_search_checkbox",
+    )
+
+    st.markdown("---")
+    st.subheader("Advanced Settings")
+    st.number_input(
+        "Mileage Value (cents per mile)",
+        min_value=0.1,
+        max_value=10.0,
+        value=1.5,
+        step=0.1,
+        format="%.2f",
+        key="miles_value_cents_input",
+        help="Set your valuation of one AAdvantage mile in cents (e.g., 1.5 for 1.5¢).",
+    )
+
+    # --- Credentials for the selected authentication method ---
+    if current_auth_method == "Manual Cookie/XSRF":
+        st.markdown("---")
+        st.text_area(
+            "Cookie String",
+            height=100,
+            help="Paste the full cookie string here.",
+            key="cookie_input_value",
+        )
+        st.text_input(
+            "XSRF Token",
+            help="Paste the XSRF token here.",
+            key="xsrf_token_input_value",
+        )
+    elif current_auth_method == "cURL Command":
+        st.markdown("---")
+        # Parsed into request headers when the search is submitted
+        st.text_area(
+            "Paste cURL Command",
+            height=200,
+            help="Paste the full cURL command copied from your browser's network tab. This will attempt to parse headers and cookies.",
+            key="curl_command_value",
+        )
+
+    st.markdown("---")
+    refresh_search_checkbox = st.checkbox(
+        "Refresh results (skip cached search)",
+        value=False,
+        help=f"Identical searches reuse results for up to {SEARCH_CACHE_TTL_SECONDS // 60} minutes. Tick to query the hotel API again.",
+        key="refresh_search_checkbox",
+    )
+
+    search_submitted = st.form_submit_button("Search for Hotel Deals")
+
+# Header-file handling stays outside the form: its Load/Clear buttons can't
+# live in a form, and an upload is read (and optionally saved) as it arrives.
+session_headers: Dict[str, str] = {}  # Initialize for this script run
+if current_auth_method == "JSON File":
+    persist_header_profile = st.sidebar.checkbox(
+        "Save headers to a named profile on this server",
+        value=False,
+        help="Off by default. Saved profiles are readable by anyone who knows the name, so only use this on a private deployment.",
+        key="persist_header_profile",
+    )
+    header_profile_name = ""
+    if persist_header_profile:
+        header_profile_name = st.sidebar.text_input(
+            "Header Profile Name",
+            value="",
+            help="Uploaded headers are saved under this name. Enter it again in a later session to load them.",
+            key="header_profile_name",
+        ).strip()
+    uploaded_headers_file = st.sidebar.file_uploader(
+        "Upload Session Headers JSON file",
+        type=["json"],
+        key="uploaded_headers_file_key",  # Added key
+    )
+    if uploaded_headers_file is not None:  # A new file has been uploaded
+        try:
+            # Parse and store in st.session_state to persist across reruns
+            st.session_state.session_headers_from_file = _loads_json(
+                uploaded_headers_file.getvalue()
+            )
+            session_headers = (
+                st.session_state.session_headers_from_file
+            )  # Use for current run
+            if header_profile_name:
+                _save_header_profile(
+                    header_profile_name, st.session_state.session_headers_from_file
+                )
+                st.sidebar.success(
+                    f"Headers file loaded and saved to profile '{header_profile_name}'."
+                )
+            else:
+                st.sidebar.success("Headers file loaded.")
+        except json.JSONDecodeError:
+            st.sidebar.error("Error decoding JSON from headers file.")
+            st.session_state.session_headers_from_file = {}  # Clear persisted on error
+            session_headers = {}  # Clear for current run
+        except Exception as e:
+            st.sidebar.error(f"Error loading headers: {e}")
+            st.session_state.session_headers_from_file = {}
+            session_headers = {}
+    elif (
+        st.session_state.session_headers_from_file
+    ):  # No new file, but we have persisted headers
+        session_headers = st.session_state.session_headers_from_file
+        st.sidebar.info("Using previously uploaded headers.")
+    elif header_profile_name:  # Only a profile named in this session is read
+        if st.sidebar.button(
+            f"Load Profile '{header_profile_name}'", key="load_header_profile_button"
+        ):
+            profile_headers = _load_header_profile(header_profile_name)
+            if profile_headers:
+                st.session_state.session_headers_from_file = profile_headers
+                session_headers = profile_headers
+                st.sidebar.info(
+                    f"Using headers saved in profile '{header_profile_name}'."
+                )
+            else:
+                st.sidebar.warning(f"No saved profile '{header_profile_name}'.")
+
+    if (
+        st.session_state.session_headers_from_file
+    ):  # Show clear button if there are stored headers
+        if st.sidebar.button(
+            "Clear Stored JSON Headers", key="clear_json_headers_button"
+        ):
+            st.session_state.session_headers_from_file = {}
+            session_headers = {}  # Clear for current run too
+            if header_profile_name:
+                _delete_header_profile(header_profile_name)
+
+aa_card_miles_rate_input = (
+    aa_card_miles_rate_selection if aa_card_bonus_checkbox else 1
+)  # Default if checkbox is off
+
 city_query_for_backend = ""  # This will hold the city string passed to the backend
 cities_to_process_log = []  # For logging/displaying what will be searched
 
 if search_type == "Specific Location(s)":
-    specific_city_input = st.sidebar.text_input(
-        "City to Search:",
-        "Las Vegas",
-        help="Enter the city you want to search.",
-        key="specific_city_input",
-    )
     if specific_city_input:
         cities_to_process_log = [specific_city_input.strip()]
         city_query_for_backend = cities_to_process_log[
@@ -175,34 +999,18 @@ if search_type == "Specific Location(s)":
         ]  # Backend currently takes one city
 
 elif search_type == "Broad Points Optimization":
-    selected_region_names = st.sidebar.multiselect(
-        "Select Regions/City Lists:",
-        options=list(PREDEFINED_CITY_LISTS.keys()),
-        help="Select one or more predefined lists of cities to search.",
-        key="selected_region_names",
-    )
-    custom_cities_input = st.sidebar.text_area(
-        "Or, add custom cities (comma-separated):",
-        help="Enter additional city names, separated by commas.",
-        key="custom_cities_input",
-    )
-
     temp_cities_list = []
     if selected_region_names:
         for region_name in selected_region_names:
-            if region_name in PREDEFINED_CITY_LISTS:
-                temp_cities_list.extend(PREDEFINED_CITY_LISTS[region_name])
+            if region_name in REGION_TO_CITIES:
+                temp_cities_list.extend(REGION_TO_CITIES[region_name])
 
     if custom_cities_input:
-        custom_cities = [
-            city.strip() for city in custom_cities_input.split(",") if city.strip()
-        ]
-        temp_cities_list.extend(custom_cities)
+        temp_cities_list.extend(CITY_SEPARATOR_RE.split(custom_cities_input.strip()))
 
-    if temp_cities_list:
-        cities_to_process_log = sorted(
-            list(set(temp_cities_list))
-        )  # Unique, sorted list
+    # Unique cities in the order given: selected regions first, then custom ones
+    cities_to_process_log = list(dict.fromkeys(city for city in temp_cities_list if city))
+    if cities_to_process_log:
         # For now, backend only takes one city. We'll pass the first one.
         # This will be updated when backend handles List[str].
         city_query_for_backend = cities_to_process_log[0]
@@ -214,45 +1022,7 @@ elif search_type == "Broad Points Optimization":
             "Please select a region or enter custom cities for broad optimization."
         )
 
-# --- Common Search Parameters ---
-default_start_date = date.today()
-default_end_date = default_start_date + timedelta(days=1)
-
-start_date_input = st.sidebar.date_input(
-    "Start Date", default_start_date, key="start_date_picker"
-)
-end_date_input = st.sidebar.date_input(
-    "End Date", default_end_date, key="end_date_picker"
-)
-
-aa_card_bonus_checkbox = st.sidebar.checkbox(
-    "AA Credit Card Bonus (10 miles/$)",
-    value=True,
-    help="Select if you are using an AAdvantage credit card for an extra 10 miles per dollar spent.",
-    key="aa_card_bonus_checkbox",
-)
-
-aa_card_miles_rate_input = 1  # Default if checkbox is off
-if aa_card_bonus_checkbox:
-    aa_card_miles_rate_input = st.sidebar.radio(
-        "AA Card Miles Rate on Spend:",
-        options=[1, 10],
-        index=0,  # Default to 1x
-        format_func=lambda x: f"{x}x miles per dollar",
-        key="aa_card_miles_rate_selector",
-        help="Select the miles earning rate on card spend (1x or 10x). Effective only if AA Card Bonus is checked.",
-    )
-
-current_lp_balance_input = st.sidebar.number_input(
-    "Current Loyalty Points Balance",
-    min_value=0,
-    value=0,
-    step=100,
-    help="Enter your current AAdvantage Loyalty Points balance to factor in status bonuses.",
-    key="current_lp_balance_input",
-)
-
-if st.sidebar.button("Search for Hotel Deals"):
+if search_submitted:
     # --- BEGIN: Fetch/Calculate all necessary values from st.session_state ---
     auth_method_on_click = st.session_state.get("auth_method_key", "cURL Command")
     curl_content_on_click = st.session_state.get("curl_command_value", "")
@@ -262,7 +1032,7 @@ if st.sidebar.button("Search for Hotel Deals"):
     if auth_method_on_click == "cURL Command" and curl_content_on_click:
         try:
             if callable(parse_curl_command):
-                parsed_url, parsed_headers_from_curl = parse_curl_command(
+                parsed_url, parsed_headers_from_curl = _parse_curl_cached(
                     curl_content_on_click
                 )
                 if parsed_headers_from_curl:
@@ -300,21 +1070,10 @@ if st.sidebar.button("Search for Hotel Deals"):
             )
             # st.sidebar.info("Using stored JSON headers for this search.") # Optional: can be verbose
 
-    # Define optimization_strategy_options locally or ensure it's defined globally before this block
-    # For this refactor, defining locally to ensure self-containment if UI order changes.
-    # However, if this dict is large or used elsewhere, global definition before button is better.
-    # Given it's already defined globally later, we can rely on that, but for robustness if UI order changes:
-    optimization_strategy_options_config = {
-        "Maximize Points per Dollar (Greedy PPD)": "points_per_dollar",
-        "Minimize Cost for Target LP (Greedy Cheapest Stays)": "minimize_cost_for_target_lp",
-        "Minimize Cost for Target LP (Dynamic Programming)": "dp_minimize_cost",
-        "Fastest Calendar Time to Target LP (Overlaps OK)": "fastest_calendar_time_lp",
-    }
     selected_strategy_key_on_click = st.session_state.get(
-        "selected_strategy_display_key",
-        list(optimization_strategy_options_config.keys())[0],
+        "selected_strategy_display_key", OPTIMIZATION_STRATEGY_LABELS[0]
     )
-    optimization_strategy_on_click = optimization_strategy_options_config[
+    optimization_strategy_on_click = OPTIMIZATION_STRATEGY_OPTIONS[
         selected_strategy_key_on_click
     ]
 
@@ -341,646 +1100,321 @@ if st.sidebar.button("Search for Hotel Deals"):
         st.error("Start date cannot be after end date.")
         st.stop()
     else:
-        progress_bar_placeholder = st.empty()
-        status_text_placeholder = st.empty()
-
-        # Updated progress callback for multi-city and iterative search feedback
-        # It now uses iterative_search_on_click
-        def streamlit_progress_callback(
-            completed_dates_in_city: int,
-            total_dates_in_city: int,
-            current_pass: Optional[int] = None,
-            pass_end_date: Optional[str] = None,
-            current_city_idx: Optional[int] = None,
-            total_cities: Optional[int] = None,
-            current_city_name: Optional[str] = None,
-            is_final_city_in_pass: bool = False,
-            status_message: Optional[str] = None,
-        ):
-            progress = 0.0
-            if total_dates_in_city > 0:
-                progress = completed_dates_in_city / total_dates_in_city
-            progress_bar_placeholder.progress(progress)
-            msg_parts = []
-            if current_pass is not None:
-                msg_parts.append(f"Pass {current_pass}")
-            if (
-                total_cities
-                and total_cities > 1
-                and current_city_idx is not None
-                and current_city_name
-            ):
-                msg_parts.append(
-                    f"City {current_city_idx}/{total_cities} ('{current_city_name}')"
-                )
-            if total_dates_in_city > 0:
-                msg_parts.append(
-                    f"Processed {completed_dates_in_city}/{total_dates_in_city} dates"
-                )
-            if pass_end_date:
-                msg_parts.append(f"(window up to {pass_end_date})")
-            if status_message:
-                msg_parts.append(f"- {status_message}")
-            elif iterative_search_on_click and is_final_city_in_pass:
-                msg_parts.append("Pass complete.")
-            elif iterative_search_on_click:
-                msg_parts.append("Searching...")
-            status_text_placeholder.text(" | ".join(msg_parts))
-
-        def style_ppd_column(df, column_name="points_per_dollar"):
-            if (
-                column_name in df.columns
-                and pd.api.types.is_numeric_dtype(df[column_name])
-                and not df[column_name].empty
-            ):
-                if df[column_name].count() > 0:
-                    return df.style.background_gradient(
-                        subset=[column_name], cmap="Greens", low=0.1, high=1.0
-                    )
-            return df
-
-        status_text_placeholder.text(
-            f"Initiating search for: {city_query_for_backend}..."
-        )
-        if (
-            search_type == "Broad Points Optimization"
-            and len(cities_to_process_log) > 1
-        ):
-            status_text_placeholder.text(
-                f"Initiating search for {city_query_for_backend} (first of {len(cities_to_process_log)} cities). Full multi-city backend processing is pending."
-            )
-
         try:
-            progress_bar_placeholder.progress(0)
             if not callable(find_best_hotel_deals):
                 st.error(
                     "Core search function 'find_best_hotel_deals' is not available. App cannot proceed."
                 )
                 st.stop()
 
-            all_hotel_options, final_itinerary, total_cost, total_points_earned = (
-                find_best_hotel_deals(
-                    city_queries=cities_to_process_log,
-                    start_date=start_date_input,
-                    end_date=end_date_input,
-                    session_headers=local_session_headers_for_search,  # Use locally prepared headers
-                    target_loyalty_points=st.session_state.get(
-                        "target_loyalty_points_input", DEFAULT_TARGET_POINTS
-                    ),
-                    progress_callback=streamlit_progress_callback,
-                    aa_card_bonus=aa_card_bonus_checkbox,
-                    aa_card_miles_rate=aa_card_miles_rate_input,
-                    optimization_strategy=optimization_strategy_on_click,  # Use fetched value
-                    iterative_search_for_lp_target=iterative_search_on_click,  # Use fetched value
-                    current_lp_balance=current_lp_balance_input,
-                    max_overlaps=(
-                        max_overlaps_on_click  # Use fetched value
-                        if optimization_strategy_on_click == "fastest_calendar_time_lp"
-                        else None
-                    ),
-                    miles_value_rate=miles_rate_on_click,  # Use fetched value
-                )
+            search_params = {
+                "city_queries": cities_to_process_log,
+                "start_date": start_date_input,
+                "end_date": end_date_input,
+                "target_loyalty_points": st.session_state.get(
+                    "target_loyalty_points_input", DEFAULT_TARGET_POINTS
+                ),
+                "aa_card_bonus": aa_card_bonus_checkbox,
+                "aa_card_miles_rate": aa_card_miles_rate_input,
+                "optimization_strategy": optimization_strategy_on_click,  # Use fetched value
+                "iterative_search_for_lp_target": iterative_search_on_click,  # Use fetched value
+                "current_lp_balance": current_lp_balance_input,
+                "max_overlaps": (
+                    max_overlaps_on_click  # Use fetched value
+                    if optimization_strategy_on_click == "fastest_calendar_time_lp"
+                    else None
+                ),
+                "miles_value_rate": miles_rate_on_click,  # Use fetched value
+            }
+            search_key = _search_cache_key(
+                search_params, local_session_headers_for_search
             )
-
-            progress_bar_placeholder.empty()
-            status_text_placeholder.empty()
-
-            st.subheader("Optimal Loyalty Points Strategy")
-            if final_itinerary:
-                total_miles_earned_itinerary = sum(
-                    s.get("miles_earned", 0) for s in final_itinerary
-                )
-                total_miles_value_itinerary = sum(
-                    s.get("miles_value", 0.0) for s in final_itinerary
-                )
-                col1, col2, col3, col4, col5, col6 = st.columns(6)
-                col1.metric(
-                    "Target LP",
-                    f"{st.session_state.get('target_loyalty_points_input', DEFAULT_TARGET_POINTS):,}",
-                )
-                col2.metric("Achieved LP", f"{total_points_earned:,}")
-                col3.metric("Total Cost", f"${total_cost:,.2f}")
-                net_new_lp_from_itinerary = (
-                    total_points_earned - current_lp_balance_input
+            pending_search = st.session_state.get("pending_search")
+            if pending_search is not None and pending_search["key"] != search_key:
+                # A different search replaces the one still running
+                _cancel_search(pending_search)
+                del st.session_state.pending_search
+                pending_search = None
+            cached_search = (
+                None
+                if refresh_search_checkbox or pending_search is not None
+                else _get_cached_search_results(search_key)
+            )
+            if cached_search is not None:
+                result_id, search_results = cached_search
+                st.session_state.last_search = _last_search_entry(
+                    search_key, result_id, search_results, search_params
                 )
-                overall_ppd = (
-                    (net_new_lp_from_itinerary / total_cost)
-                    if total_cost > 0 and net_new_lp_from_itinerary > 0
-                    else 0
+            elif pending_search is None:  # Same search still running: re-attach
+                status_message = f"Initiating search for: {city_query_for_backend}..."
+                if (
+                    search_type == "Broad Points Optimization"
+                    and len(cities_to_process_log) > 1
+                ):
+                    status_message = f"Initiating search for {city_query_for_backend} (first of {len(cities_to_process_log)} cities). Full multi-city backend processing is pending."
+                st.session_state.pending_search = _start_search(
+                    search_key,
+                    search_params,
+                    local_session_headers_for_search,  # Use locally prepared headers
+                    status_message,
                 )
-                col4.metric("Overall LP PPD", f"{overall_ppd:.2f}")
-                col5.metric("Total Miles Earned", f"{total_miles_earned_itinerary:,}")
-                col6.metric("Total Miles Value", f"${total_miles_value_itinerary:,.2f}")
-
-                st.markdown("---")
-                st.write("Itinerary Details:")
-                df_itinerary = pd.DataFrame(final_itinerary)
-                display_cols_itinerary = [
-                    "name",
-                    "location",
-                    "check_in_date",
-                    "total_price",
-                    "api_points_earned",
-                    "card_bonus_points",
-                    "status_bonus_points",
-                    "points_earned_final_for_itinerary",
-                    "points_per_dollar_final_for_itinerary",
-                    "miles_earned",
-                    "miles_value",
+        except Exception as e:
+            st.session_state.pop("last_search", None)
+            st.error(f"An error occurred during the search: {e}")
+            st.exception(e)
+
+# The search outlives the script run that started it: after a rerun or Stop,
+# the next run picks it up here and keeps rendering its progress.
+pending_search = st.session_state.get("pending_search")
+if pending_search is not None:
+    progress_bar_placeholder = st.empty()
+    status_text_placeholder = st.empty()
+    try:
+        search_results = _await_search(
+            pending_search, progress_bar_placeholder, status_text_placeholder
+        )
+        st.session_state.last_search = _last_search_entry(
+            pending_search["key"],
+            pending_search["result_id"],
+            search_results,
+            pending_search["params"],
+        )
+    except Exception as e:
+        st.session_state.pop("last_search", None)
+        st.error(f"An error occurred during the search: {e}")
+        st.exception(e)
+    # Not in a finally: a rerun or Stop mid-poll must leave the search pending
+    del st.session_state.pending_search
+    progress_bar_placeholder.empty()
+    status_text_placeholder.empty()
+
+# Results are kept in session state so they survive reruns caused by any widget
+last_search = st.session_state.get("last_search")
+if last_search is not None:
+    search_key = last_search["key"]
+    all_hotel_options, final_itinerary, total_cost, total_points_earned = last_search[
+        "results"
+    ]
+    try:
+        st.subheader("Optimal Loyalty Points Strategy")
+        if final_itinerary:
+            df_itinerary = _itinerary_frame(last_search["result_id"], final_itinerary)
+            itinerary_totals = (
+                df_itinerary.reindex(columns=["miles_earned", "miles_value"])
+                .fillna(0)
+                .sum()
+            )
+            total_miles_earned_itinerary = int(itinerary_totals["miles_earned"])
+            total_miles_value_itinerary = float(itinerary_totals["miles_value"])
+            col1, col2, col3, col4, col5, col6 = st.columns(6)
+            col1.metric("Target LP", f"{last_search['target_loyalty_points']:,}")
+            col2.metric("Achieved LP", f"{total_points_earned:,}")
+            col3.metric("Total Cost", f"${total_cost:,.2f}")
+            net_new_lp_from_itinerary = (
+                total_points_earned - last_search["current_lp_balance"]
+            )
+            overall_ppd = (
+                (net_new_lp_from_itinerary / total_cost)
+                if total_cost > 0 and net_new_lp_from_itinerary > 0
+                else 0
+            )
+            col4.metric("Overall LP PPD", f"{overall_ppd:.2f}")
+            col5.metric("Total Miles Earned", f"{total_miles_earned_itinerary:,}")
+            col6.metric("Total Miles Value", f"${total_miles_value_itinerary:,.2f}")
+
+            st.markdown("---")
+            st.write("Itinerary Details:")
+            itinerary_columns = frozenset(df_itinerary.columns)
+            df_itinerary_display = df_itinerary.reindex(
+                columns=[
+                    col for col in ITINERARY_DISPLAY_COLUMNS if col in itinerary_columns
                 ]
-                df_itinerary_display = df_itinerary[
-                    [
-                        col
-                        for col in display_cols_itinerary
-                        if col in df_itinerary.columns
-                    ]
-                ].copy()
-                column_config_itinerary = {
-                    "name": st.column_config.TextColumn("Hotel Name", width="large"),
-                    "location": "Location",
-                    "check_in_date": "Check-in",
-                    "total_price": st.column_config.NumberColumn(
-                        "Price", format="$%.2f"
-                    ),
-                    "api_points_earned": st.column_config.NumberColumn(
-                        "API Points",
-                        format="%d",
-                        help="Base points from the hotel booking.",
-                    ),
-                    "card_bonus_points": st.column_config.NumberColumn(
-                        "Card Bonus",
-                        format="%d",
-                        help="Points from AA credit card (10 miles/$).",
-                    ),
-                    "status_bonus_points": st.column_config.NumberColumn(
-                        "Status Bonus",
-                        format="%d",
-                        help="Points from AAdvantage status bonus.",
-                    ),
-                    "points_earned_final_for_itinerary": st.column_config.NumberColumn(
-                        "Total Stay LP",
-                        format="%d",
-                        help="Total Loyalty Points for this stay (API + Card + Status).",
-                    ),
-                    "points_per_dollar_final_for_itinerary": st.column_config.NumberColumn(
-                        "Stay LP PPD",
-                        format="%.2f",
-                        help="Total Loyalty Points / Price for this stay.",
-                    ),
-                    "miles_earned": st.column_config.NumberColumn(
-                        "Miles Earned",
-                        format="%d",
-                        help="Total miles earned for this stay (LPs + spend miles if card used).",
-                    ),
-                    "miles_value": st.column_config.NumberColumn(
-                        "Miles Value ($)",
-                        format="$%.2f",
-                        help="Value of miles earned for this stay (at $0.015/mile).",
-                    ),
-                }
-                active_column_config_itinerary = {
-                    k: v
-                    for k, v in column_config_itinerary.items()
-                    if k in df_itinerary_display.columns
-                }
-                styled_df_itinerary = style_ppd_column(
-                    df_itinerary_display,
-                    column_name="points_per_dollar_final_for_itinerary",
-                )
-                st.dataframe(
-                    styled_df_itinerary, column_config=active_column_config_itinerary
+            )
+            active_column_config_itinerary = _itinerary_column_config(
+                tuple(df_itinerary_display.columns)
+            )
+            styled_df_itinerary = style_ppd_column(
+                df_itinerary_display,
+                column_name="points_per_dollar_final_for_itinerary",
+            )
+            st.dataframe(
+                styled_df_itinerary, column_config=active_column_config_itinerary
+            )
+        else:
+            st.write(
+                f"Could not form an itinerary to meet the target of {last_search['target_loyalty_points']} points from the found options."
+            )
+
+        st.subheader("All Hotel Options Found")
+        if all_hotel_options:
+            df_all_options_display, final_display_cols_all = _all_options_frame(
+                last_search["result_id"], all_hotel_options
+            )
+
+            active_column_config_all = {
+                k: ALL_OPTIONS_COLUMN_CONFIG[k]
+                for k in final_display_cols_all
+                if k in ALL_OPTIONS_COLUMN_CONFIG
+            }
+            # Only the visible page is styled and sent to the frontend
+            total_options = len(df_all_options_display)
+            page_count = max(1, -(-total_options // ALL_OPTIONS_PAGE_SIZE))
+            page_number = 1
+            if page_count > 1:
+                page_number = st.number_input(
+                    f"Page (1-{page_count})",
+                    min_value=1,
+                    max_value=page_count,
+                    value=1,
+                    step=1,
+                    key=f"all_options_page_{search_key}",
                 )
-            else:
-                st.write(
-                    f"Could not form an itinerary to meet the target of {st.session_state.get('target_loyalty_points_input', DEFAULT_TARGET_POINTS)} points from the found options."
+            page_start = (page_number - 1) * ALL_OPTIONS_PAGE_SIZE
+            page_end = min(page_start + ALL_OPTIONS_PAGE_SIZE, total_options)
+            if page_count > 1:
+                st.caption(
+                    f"Showing options {page_start + 1}-{page_end} of {total_options}, best PPD first."
                 )
+            # Shade each page against the full PPD range, not just its own rows
+            ppd_vmin = ppd_vmax = None
+            if "points_per_dollar" in df_all_options_display.columns and (
+                pd.api.types.is_numeric_dtype(df_all_options_display["points_per_dollar"])
+            ):
+                ppd_vmin = df_all_options_display["points_per_dollar"].min()
+                ppd_vmax = df_all_options_display["points_per_dollar"].max()
+            styled_df_all_options = style_ppd_column(
+                df_all_options_display.iloc[page_start:page_end][final_display_cols_all],
+                vmin=ppd_vmin,
+                vmax=ppd_vmax,
+            )
+            st.dataframe(
+                styled_df_all_options, column_config=active_column_config_all
+            )
 
-            st.subheader("All Hotel Options Found")
-            if all_hotel_options:
-                df_all_options = pd.DataFrame(all_hotel_options)
-                display_cols_all = [
-                    "name",
-                    "location",
-                    "check_in_date",
-                    "total_price",
-                    "api_points_earned",
-                    "card_bonus_points",
-                    "points_earned",
-                    "points_per_dollar",
-                    "miles_earned",
-                    "miles_value",
-                    "refundability",
-                    "star_rating",
-                    "user_rating",
-                ]
-                df_all_options_display = df_all_options[
-                    [col for col in display_cols_all if col in df_all_options.columns]
-                ].copy()
-                if "refundability" in df_all_options_display.columns:
-                    df_all_options_display.loc[:, "refundability"] = (
-                        df_all_options_display["refundability"].apply(
-                            lambda x: "✅ Refundable"
-                            if x == "REFUNDABLE"
-                            else (
-                                "❌ Non-Refundable"
-                                if x == "NON_REFUNDABLE"
-                                else "❓ Unknown"
-                            )
-                        )
-                    )
-                if "star_rating" in df_all_options_display.columns:
-                    df_all_options_display.loc[:, "star_rating_display"] = (
-                        df_all_options_display["star_rating"].apply(
-                            lambda x: f"{x:.1f} ⭐" if pd.notna(x) and x > 0 else "N/A"
-                        )
-                    )
-                    display_cols_all = [
-                        col if col != "star_rating" else "star_rating_display"
-                        for col in display_cols_all
-                    ]
-                final_display_cols_all = [
-                    col
-                    for col in display_cols_all
-                    if col in df_all_options_display.columns
-                ]
+            st.markdown("---")
+            st.subheader("Visualizations for All Hotel Options")
+            col1, col2 = st.columns(2)
+            with col1:
                 if (
                     "points_per_dollar" in df_all_options_display.columns
-                    and pd.api.types.is_numeric_dtype(
+                    and not df_all_options_display["points_per_dollar"].empty
+                ):
+                    st.write("Distribution of Points per Dollar")
+                    st.bar_chart(
                         df_all_options_display["points_per_dollar"]
+                        .value_counts()
+                        .sort_index()
                     )
+                else:
+                    st.write("Points per Dollar data not available for histogram.")
+            with col2:
+                if (
+                    "total_price" in df_all_options_display.columns
+                    and "points_per_dollar" in df_all_options_display.columns
+                    and not df_all_options_display[
+                        ["total_price", "points_per_dollar"]
+                    ].empty
                 ):
-                    df_all_options_display = df_all_options_display.sort_values(
-                        by=["points_per_dollar"], ascending=False
+                    st.write("Price vs. Points per Dollar (PPD)")
+                    scatter_df = pd.DataFrame(
+                        {
+                            "Total Price ($)": df_all_options_display[
+                                "total_price"
+                            ].to_numpy(),
+                            "Base+Card PPD": df_all_options_display[
+                                "points_per_dollar"
+                            ].to_numpy(),
+                        }
                     )
-
-                column_config_all = {
-                    "name": st.column_config.TextColumn("Hotel Name", width="large"),
-                    "location": "Location",
-                    "check_in_date": "Check-in",
-                    "total_price": st.column_config.NumberColumn(
-                        "Price", format="$%.2f"
-                    ),
-                    "api_points_earned": st.column_config.NumberColumn(
-                        "API Points",
-                        format="%d",
-                        help="Base points from the hotel booking.",
-                    ),
-                    "card_bonus_points": st.column_config.NumberColumn(
-                        "Card Bonus",
-                        format="%d",
-                        help="Points from AA credit card (10 miles/$).",
-                    ),
-                    "points_earned": st.column_config.NumberColumn(
-                        "Base+Card LP",
-                        format="%d",
-                        help="API Points + Card Bonus. Status bonus is applied during itinerary selection.",
-                    ),
-                    "points_per_dollar": st.column_config.NumberColumn(
-                        "Base+Card LP PPD",
-                        format="%.2f",
-                        help="PPD based on API Points + Card Bonus (LPs only).",
-                    ),
-                    "miles_earned": st.column_config.NumberColumn(
-                        "Miles Earned (Stay)",
-                        format="%d",
-                        help="Total miles for this stay (LPs + spend miles if card used), reflects final calculation.",
-                    ),
-                    "miles_value": st.column_config.NumberColumn(
-                        "Miles Value (Stay, $)",
-                        format="$%.2f",
-                        help="Value of miles for this stay (at $0.015/mile), reflects final calculation.",
-                    ),
-                    "refundability": "Refundable",
-                    "star_rating_display": st.column_config.TextColumn("Stars"),
-                    "user_rating": st.column_config.NumberColumn(
-                        "Rating", format="%.1f"
-                    ),
-                }
-                active_column_config_all = {
-                    k: v
-                    for k, v in column_config_all.items()
-                    if k in final_display_cols_all
-                }
-                styled_df_all_options = style_ppd_column(
-                    df_all_options_display[final_display_cols_all]
-                )
-                st.dataframe(
-                    styled_df_all_options, column_config=active_column_config_all
-                )
-
-                st.markdown("---")
-                st.subheader("Visualizations for All Hotel Options")
-                col1, col2 = st.columns(2)
-                with col1:
-                    if (
-                        "points_per_dollar" in df_all_options_display.columns
-                        and not df_all_options_display["points_per_dollar"].empty
-                    ):
-                        st.write("Distribution of Points per Dollar")
-                        st.bar_chart(
-                            df_all_options_display["points_per_dollar"]
-                            .value_counts()
-                            .sort_index()
-                        )
-                    else:
-                        st.write("Points per Dollar data not available for histogram.")
-                with col2:
-                    if (
-                        "total_price" in df_all_options_display.columns
-                        and "points_per_dollar" in df_all_options_display.columns
-                        and not df_all_options_display[
-                            ["total_price", "points_per_dollar"]
-                        ].empty
-                    ):
-                        st.write("Price vs. Points per Dollar (PPD)")
-                        scatter_df = df_all_options_display[
-                            ["total_price", "points_per_dollar"]
-                        ].copy()
-                        scatter_df.columns = ["Total Price ($)", "Base+Card PPD"]
-                        st.scatter_chart(
-                            scatter_df, x="Total Price ($)", y="Base+Card PPD"
-                        )
-                    else:
-                        st.write("Price/PPD data not available for scatter plot.")
-                st.markdown("---")
-
-                st.subheader("Additional Data Distributions")
-
-                def plot_histogram(
-                    df_plot, col_name, chart_title, x_label, altair_is_available_param
-                ):  # Renamed altair_is_available to avoid conflict
-                    if (
-                        col_name in df_plot.columns
-                        and not df_plot[col_name].empty
-                        and df_plot[col_name].count() > 0
-                    ):
-                        st.write(chart_title)
-                        data_for_plot = df_plot[[col_name]].dropna()
-                        if data_for_plot.empty:
-                            st.write(
-                                f"No valid data for {chart_title} after dropping NaNs."
-                            )
-                            return
-                        if (
-                            altair_is_available_param and alt is not None
-                        ):  # Use the parameter
-                            try:
-                                hist_chart = (
-                                    alt.Chart(data_for_plot)
-                                    .mark_bar()
-                                    .encode(
-                                        alt.X(
-                                            f"{col_name}:Q",
-                                            bin=alt.Bin(maxbins=20),
-                                            title=x_label,
-                                        ),
-                                        alt.Y("count()", title="Number of Hotels"),
-                                    )
-                                    .properties()
-                                )
-                                st.altair_chart(hist_chart, use_container_width=True)
-                            except Exception as ex:
-                                st.write(
-                                    f"Could not generate Altair chart for {chart_title}: {ex}. Falling back."
-                                )
-                                value_counts_data = (
-                                    data_for_plot[col_name].value_counts().sort_index()
-                                )
-                                if not value_counts_data.empty:
-                                    st.bar_chart(value_counts_data)
-                                else:
-                                    st.write(
-                                        f"No data to plot with fallback for {chart_title}."
-                                    )
-                        else:
-                            value_counts_data = (
-                                data_for_plot[col_name].value_counts().sort_index()
-                            )
-                            if not value_counts_data.empty:
-                                st.bar_chart(value_counts_data)
-                            else:
-                                st.write(
-                                    f"No data to plot with st.bar_chart for {chart_title}."
-                                )
-                    else:
-                        st.write(
-                            f"{chart_title} data not available or empty in the dataset."
-                        )
-
-                viz_col1, viz_col2, viz_col3 = st.columns(3)
-                with viz_col1:
-                    plot_histogram(
-                        df_all_options_display,
-                        "total_price",
-                        "Distribution of Total Price",
-                        "Total Price ($)",
-                        altair_available,
-                    )  # Pass global altair_available
-                with viz_col2:
-                    temp_df_ratings = df_all_options_display.copy()
-                    if "user_rating" in temp_df_ratings.columns:
-                        temp_df_ratings["user_rating_numeric"] = pd.to_numeric(
-                            temp_df_ratings["user_rating"], errors="coerce"
+                    st.scatter_chart(
+                        scatter_df, x="Total Price ($)", y="Base+Card PPD"
+                    )
+                else:
+                    st.write("Price/PPD data not available for scatter plot.")
+            st.markdown("---")
+
+            st.subheader("Additional Data Distributions")
+            alt = _get_altair()
+
+            def altair_histogram(hist, chart_title, x_label):
+                """Returns an Altair chart for hist, or None if it can't be built."""
+                if alt is None or hist is None or hist.empty:
+                    return None
+                try:
+                    # Bins come from Python so only HISTOGRAM_BINS rows reach
+                    # the browser instead of every option. Concatenated views
+                    # don't stretch to the container, so each gets a width.
+                    return (
+                        alt.Chart(hist)
+                        .mark_bar()
+                        .encode(
+                            x=alt.X("bin_start:Q", title=x_label),
+                            x2="bin_end:Q",
+                            y=alt.Y("count:Q", title="Number of Hotels"),
                         )
-                        plot_histogram(
-                            temp_df_ratings,
-                            "user_rating_numeric",
-                            "Distribution of User Rating",
-                            "User Rating",
-                            altair_available,
-                        )  # Pass global altair_available
-                    else:
-                        st.write("User Rating data not available.")
-                with viz_col3:
-                    plot_histogram(
-                        df_all_options_display,
-                        "star_rating",
-                        "Distribution of Star Rating",
-                        "Star Rating (Numeric)",
-                        altair_available,
-                    )  # Pass global altair_available
-                st.markdown("---")
-            else:
-                st.write("No hotel options found for the given criteria.")
-        except Exception as e:
-            progress_bar_placeholder.empty()
-            status_text_placeholder.empty()
-            st.error(f"An error occurred during the search: {e}")
-            st.exception(e)
-else:
-    st.info(
-        "Enter search parameters in the sidebar and click 'Search for Hotel Deals'."
-    )
-
-st.sidebar.markdown("---")
-st.sidebar.subheader("Authentication Details")
-st.sidebar.caption(
-    "Note: Authenticated requests (e.g., via cURL or headers file) are recommended to see personalized bonus levels, "
-    "promotional offers, and accurate mileage earnings based on your AAdvantage status or specific card benefits."
-)
-
-# Store the auth method from *before* the radio button potentially changes it in this run
-# This helps detect if the user switched away from "JSON File" method
-previous_auth_method_for_json_handling = st.session_state.auth_method_key
-
-# Render the radio button. Its state is now updated in st.session_state.auth_method_key
-st.sidebar.radio(
-    "Authentication Method",
-    ("cURL Command", "Manual Cookie/XSRF", "JSON File"),
-    index=0,  # Default to "cURL Command" if key not in session_state or is None
-    help="Choose how to provide authentication details. cURL is often easiest if you can copy it from your browser's developer tools.",
-    key="auth_method_key",
-)
-# current_auth_method is the source of truth for the selected auth method
-current_auth_method = st.session_state.auth_method_key
-
-# If auth method was "JSON File" and has now changed to something else, clear the stored JSON headers
-if (
-    previous_auth_method_for_json_handling == "JSON File"
-    and current_auth_method != "JSON File"
-):
-    st.session_state.session_headers_from_file = {}
-    # st.sidebar.caption("Cleared previously uploaded JSON headers due to method change.") # Optional user feedback
-
-session_headers: Dict[str, str] = {}  # Initialize for this script run
-# This variable will hold the text from the cURL input area if that's the selected method.
-# It's populated by the widget itself, drawing from st.session_state.curl_command_value.
-curl_command_text_area_content = ""
-
-
-if current_auth_method == "Manual Cookie/XSRF":
-    # Widgets use keys, so their values are in st.session_state
-    st.sidebar.text_area(
-        "Cookie String",
-        height=100,
-        help="Paste the full cookie string here.",
-        key="cookie_input_value",
-    )
-    st.sidebar.text_input(
-        "XSRF Token", help="Paste the XSRF token here.", key="xsrf_token_input_value"
-    )
-    # Populate session_headers from the sticky session state values
-    if st.session_state.get("cookie_input_value"):
-        session_headers["Cookie"] = st.session_state.cookie_input_value.strip()
-    if st.session_state.get("xsrf_token_input_value"):
-        session_headers["X-XSRF-TOKEN"] = (
-            st.session_state.xsrf_token_input_value.strip()
-        )
+                        .properties(title=chart_title, width=HISTOGRAM_CHART_WIDTH)
+                    )
+                except Exception as ex:
+                    st.write(
+                        f"Could not generate Altair chart for {chart_title}: {ex}. Falling back."
+                    )
+                    return None
 
-elif current_auth_method == "cURL Command":
-    # The text area widget populates st.session_state.curl_command_value
-    # and returns its current content to curl_command_text_area_content.
-    curl_command_text_area_content = st.sidebar.text_area(
-        "Paste cURL Command",
-        height=200,
-        help="Paste the full cURL command copied from your browser's network tab. This will attempt to parse headers and cookies.",
-        key="curl_command_value",
-    )
-    # session_headers from cURL are parsed and populated upon button click.
+            def plot_histogram_fallback(hist, chart_title):
+                if hist is None or hist.empty:
+                    st.write(
+                        f"{chart_title} data not available or empty in the dataset."
+                    )
+                    return
+                st.write(chart_title)
+                st.bar_chart(_histogram_counts(hist))
 
-elif current_auth_method == "JSON File":
-    uploaded_headers_file = st.sidebar.file_uploader(
-        "Upload Session Headers JSON file",
-        type=["json"],
-        key="uploaded_headers_file_key",  # Added key
-    )
-    if uploaded_headers_file is not None:  # A new file has been uploaded
-        try:
-            # Parse and store in st.session_state to persist across reruns
-            st.session_state.session_headers_from_file = json.load(
-                uploaded_headers_file
+            histograms = _all_options_histograms(
+                last_search["result_id"], df_all_options_display
             )
-            session_headers = (
-                st.session_state.session_headers_from_file
-            )  # Use for current run
-            st.sidebar.success("Headers file loaded and stored in session.")
-        except json.JSONDecodeError:
-            st.sidebar.error("Error decoding JSON from headers file.")
-            st.session_state.session_headers_from_file = {}  # Clear persisted on error
-            session_headers = {}  # Clear for current run
-        except Exception as e:
-            st.sidebar.error(f"Error loading headers: {e}")
-            st.session_state.session_headers_from_file = {}
-            session_headers = {}
-    elif (
-        st.session_state.session_headers_from_file
-    ):  # No new file, but we have persisted headers
-        session_headers = st.session_state.session_headers_from_file
-        st.sidebar.info("Using previously uploaded headers.")
-
-    if (
-        st.session_state.session_headers_from_file
-    ):  # Show clear button if there are stored headers
-        if st.sidebar.button(
-            "Clear Stored JSON Headers", key="clear_json_headers_button"
-        ):
-            st.session_state.session_headers_from_file = {}
-            session_headers = {}  # Clear for current run too
-
-st.sidebar.markdown("---")
-st.sidebar.subheader("Optimization Strategy")
-optimization_strategy_options = {
-    "Maximize Points per Dollar (Greedy PPD)": "points_per_dollar",
-    "Minimize Cost for Target LP (Greedy Cheapest Stays)": "minimize_cost_for_target_lp",
-    "Minimize Cost for Target LP (Dynamic Programming)": "dp_minimize_cost",
-    "Fastest Calendar Time to Target LP (Overlaps OK)": "fastest_calendar_time_lp",
-}
-selected_strategy_display = st.sidebar.radio(
-    "Choose Optimization Method:",
-    options=list(optimization_strategy_options.keys()),
-    index=0,  # Default to PPD
-    help=(
-        "Maximize PPD: Good for general high-value stays.\n"
-        "Minimize Cost (Greedy): Finds the cheapest stays to hit LP target quickly.\n"
-        "Minimize Cost (DP): More thorough, aims for true minimum cost to hit LP target (can be slower).\n"
-        "Fastest Calendar Time to Target LP: Aims to complete the LP target by the earliest possible calendar date, allowing stays to overlap."
-    ),
-    key="selected_strategy_display_key",
-)
-optimization_strategy_value = optimization_strategy_options[selected_strategy_display]
-
-# Add conditional input for max overlaps for the specific strategy
-max_concurrent_overlaps = 5  # Default value
-if optimization_strategy_value == "fastest_calendar_time_lp":
-    max_concurrent_overlaps = st.sidebar.number_input(
-        "Max Concurrent Overlaps:",
-        min_value=1,
-        max_value=20,  # Arbitrary upper limit, can be adjusted
-        value=5,
-        step=1,
-        key="max_concurrent_overlaps_input",
-        help="Set the maximum number of hotel stays that can overlap on any given day for the 'Fastest Calendar Time' strategy.",
+            histogram_inputs = (
+                (
+                    histograms.get("total_price"),
+                    "Distribution of Total Price",
+                    "Total Price ($)",
+                ),
+                (
+                    histograms.get("user_rating"),
+                    "Distribution of User Rating",
+                    "User Rating",
+                ),
+                (
+                    histograms.get("star_rating"),
+                    "Distribution of Star Rating",
+                    "Star Rating (Numeric)",
+                ),
+            )
+            altair_charts = []
+            fallback_inputs = []
+            for hist, chart_title, x_label in histogram_inputs:
+                chart = altair_histogram(hist, chart_title, x_label)
+                if chart is not None:
+                    altair_charts.append(chart)
+                else:
+                    fallback_inputs.append((hist, chart_title))
+            if altair_charts:
+                # One Vega-Lite spec for all distributions instead of one per chart
+                st.altair_chart(alt.hconcat(*altair_charts))
+            if fallback_inputs:
+                for viz_column, (hist, chart_title) in zip(
+                    st.columns(len(fallback_inputs)), fallback_inputs
+                ):
+                    with viz_column:
+                        plot_histogram_fallback(hist, chart_title)
+            st.markdown("---")
+        else:
+            st.write("No hotel options found for the given criteria.")
+    except Exception as e:
+        st.error(f"An error occurred while displaying the results: {e}")
+        st.exception(e)
+elif not search_submitted:
+    st.info(
+        "Enter search parameters in the sidebar and click 'Search for Hotel Deals'."
     )
 
 st.sidebar.markdown("---")
-st.sidebar.subheader("Search Mode")
-target_loyalty_points = st.sidebar.number_input(
-    "Target Loyalty Points",
-    min_value=0,
-    value=DEFAULT_TARGET_POINTS,
-    step=1000,
-    key="target_loyalty_points_input",
-)
-iterative_search_checkbox = st.sidebar.checkbox(
-    "Search future dates until LP target is met",
-    value=False,
-    help="If checked, the search will extend into future dates (up to ~6 months or as configured) until the LP target is met.",
-    key="iterative_search_checkbox",
-)
-
-st.sidebar.markdown("---")
-st.sidebar.subheader("Advanced Settings")
-miles_value_cents_input = st.sidebar.number_input(
-    "Mileage Value (cents per mile)",
-    min_value=0.1,
-    max_value=10.0,
-    value=1.5,
-    step=0.1,
-    format="%.2f",
-    key="miles_value_cents_input",
-    help="Set your valuation of one AAdvantage mile in cents (e.g., 1.5 for 1.5¢).",
-)
-# Convert cents to decimal for backend (e.g., 1.5 cents -> 0.015)
-miles_value_rate_for_backend = miles_value_cents_input / 100.0
-
-st.sidebar.markdown("---")